@@ -8,12 +8,14 @@ from flask import Flask, abort, flash, redirect, render_template, request, sessi
 from markupsafe import escape
 from werkzeug.utils import secure_filename
 # import the local supporting objects such as:
-# blur, save, mode, fix_lab_path, and UserManagement.
+# blur, save, mode, fix_lab_path, PrincipalCache, verify_session and UserManagement.
 from . import *
 
 # A fake user management service used to authenticate users.
 user_management = UserManagement()
 user_management.upsert_user('admin', 'magic')
+# Sessions verified against user_management, cached by session id for 5 minutes.
+principals = PrincipalCache(ttl=300)
 
 # App configuration
 app = Flask(__name__)
@@ -39,18 +41,19 @@ def requires_login(func):
     # 2.) The wrapper must maintain the name of the wrapped function.
     #
     # 3.) Wrapper Logic:
-    #       Call the wrapped function and return the results if the
-    #       key 'username' exists in the global session object.
+    #       Call the wrapped function and return the results if
+    #       verify_session finds a logged in user in the global session object.
+    #       Verified sessions are cached, so this is usually a dict lookup.
     #
-    #       Call the redirect function with the login url if the
-    #       key 'username' does not exist in the global session object.
+    #       Call the redirect function with the login url if
+    #       verify_session returns None.
     #
     # 4.) Apply this decorator to the image function.
     #     Must be placed under the existing decorators.
     ###############################################################################
     @wraps(func)
     def wrapper(*args, **kwargs):
-        if 'username' not in session:
+        if verify_session(session, principals, user_management) is None:
             return redirect(url_for('login'))
         return func(*args, **kwargs)
 
@@ -70,8 +73,15 @@ def login():
         username = request.form['username']
         password = request.form['password']
 
-        if user_management.authenticate(username, password):
-            session['username'] = username
+        try:
+            authenticated = user_management.authenticate(username, password)
+        except (HashingOverloaded, HashingTimeout) as ex:
+            app.logger.warning(str(ex))
+            flash('Too many logins right now. Please try again shortly.')
+            return render_template('login.html'), 503, {'Retry-After': '1'}
+
+        if authenticated:
+            start_session(session, username)
 
             flash('Welcome back!')
             return redirect(url_for('index'))
@@ -84,7 +94,7 @@ def login():
 
 @app.route('/logout')
 def logout():
-    session.pop('username', None)
+    end_session(session, principals)
     return redirect(url_for('index'))
 
 
@@ -0,0 +1,55 @@
+''' Memory benchmark comparing BookTable with a list of Book objects.
+
+    > python bench_book_table.py
+    > python bench_book_table.py --size 100000
+
+    Overhead is the memory used per book excluding the UTF-8 title text,
+    which has to be stored whichever layout is used. Target: < 40 bytes.
+'''
+import argparse
+import tracemalloc
+
+from book_table import BookTable
+from library import Book
+
+
+def rows(size: int):
+    for n in range(size):
+        yield f'Title {n}', f'Author {n // 20}', f'978{n:010d}'
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    result = build()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return used
+
+
+def build_table(size: int) -> BookTable:
+    table = BookTable()
+    for title, author, isbn in rows(size):
+        table.append(title, author, isbn)
+    return table
+
+
+def build_objects(size: int) -> list:
+    return [Book(title, author, isbn) for title, author, isbn in rows(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    title_bytes = sum(len(title.encode()) for title, _, _ in rows(args.size))
+
+    print(f'{"layout":>12} {"bytes/book":>12} {"overhead/book":>14}')
+    for name, build in [('BookTable', build_table), ('list[Book]', build_objects)]:
+        used = measure(lambda: build(args.size))
+        print(f'{name:>12} {used / args.size:>12.1f} {(used - title_bytes) / args.size:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+''' Checkout / return throughput of a thread safe Library under contention.
+
+    > python bench_contention.py
+    > python bench_contention.py --threads 1 8 64 --stripes 1
+
+    Every thread repeatedly checks out and returns books from its own range,
+    so threads only contend on locks, never on the same book.
+    --stripes 1 approximates a single global lock for comparison.
+'''
+import argparse
+import threading
+import time
+
+from library import Book, Library, Member
+
+THREADS = [1, 2, 4, 8, 16, 32, 64]
+BOOKS_PER_THREAD = 100
+
+
+def worker(library: Library, member_id, isbns, operations, latencies):
+    for n in range(operations):
+        isbn = isbns[n % len(isbns)]
+        start = time.perf_counter_ns()
+        library.checkout(isbn, member_id)
+        library.return_book(isbn)
+        latencies.append(time.perf_counter_ns() - start)
+
+
+def run(threads: int, stripes: int, operations: int):
+    library = Library('benchmark', thread_safe=True, stripes=stripes)
+    for n in range(threads * BOOKS_PER_THREAD):
+        library.add_book(Book(f'Title {n}', 'Author', f'{n:013d}'))
+    for member_id in range(threads):
+        library.add_member(Member(f'Member {member_id}', member_id))
+
+    latencies = [[] for _ in range(threads)]
+    workers = [
+        threading.Thread(target=worker, args=(
+            library, member_id,
+            [f'{n:013d}' for n in range(member_id * BOOKS_PER_THREAD, (member_id + 1) * BOOKS_PER_THREAD)],
+            operations, latencies[member_id]))
+        for member_id in range(threads)
+    ]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(latency for thread_latencies in latencies for latency in thread_latencies)
+    p99 = samples[int(len(samples) * 0.99)] / 1e3
+    return len(samples) / elapsed, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, nargs='+', default=THREADS)
+    parser.add_argument('--stripes', type=int, default=64)
+    parser.add_argument('--operations', type=int, default=10_000, help='checkout / return pairs per thread')
+    args = parser.parse_args()
+
+    print(f'{"threads":>8} {"ops/s":>12} {"p99 us":>10}')
+    for threads in args.threads:
+        throughput, p99 = run(threads, args.stripes, args.operations)
+        print(f'{threads:>8} {throughput:>12,.0f} {p99:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+''' Throughput and peak RSS of the streaming importer.
+
+    > python bench_importer.py
+    > python bench_importer.py --rows 100000 --format jsonl
+
+    Roughly 1% of the generated rows are duplicates and 1% have a bad check digit.
+'''
+import argparse
+import csv
+import json
+import os
+import tempfile
+
+from importer import import_catalog
+from library import Library
+
+
+def isbn13(n: int) -> str:
+    body = f'978{n:09d}'
+    check = -sum(int(digit) * (3 if position % 2 else 1) for position, digit in enumerate(body)) % 10
+    return f'{body}{check}'
+
+
+def generate(path, rows: int, file_format: str):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file) if file_format == 'csv' else None
+        if writer:
+            writer.writerow(['title', 'author', 'isbn'])
+        for n in range(rows):
+            isbn = isbn13(n - 1 if n % 100 == 1 else n)
+            if n % 100 == 2:
+                isbn = isbn[:-1] + str((int(isbn[-1]) + 1) % 10)
+            if writer:
+                writer.writerow([f'Title {n}', f'Author {n // 20}', isbn])
+            else:
+                file.write(json.dumps({'title': f'Title {n}', 'author': f'Author {n // 20}', 'isbn': isbn}) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f'bench_catalog.{args.format}')
+    generate(path, args.rows, args.format)
+    print(f'input: {os.path.getsize(path) / 2**20:.1f} MB')
+    try:
+        print(import_catalog(Library('benchmark'), path, args.chunk_size))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+''' Lookup latency benchmark for the indexed Library catalog.
+
+    > python bench_library.py
+    > python bench_library.py --sizes 1000 100000
+
+    Lookups by ISBN, author and title should stay flat as the catalog grows.
+'''
+import argparse
+import random
+import time
+
+from library import Book, Library
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 5_000_000]
+QUERIES = 10_000
+
+
+def build_library(size: int) -> Library:
+    library = Library('benchmark')
+    for n in range(size):
+        # Roughly 20 books per author, every title is unique.
+        library.add_book(Book(f'Title {n}', f'Author {n // 20}', f'{n:013d}'))
+    return library
+
+
+def per_lookup_ns(lookup, keys) -> float:
+    start = time.perf_counter_ns()
+    for key in keys:
+        lookup(key)
+    return (time.perf_counter_ns() - start) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+
+    print(f'{"books":>10} {"isbn ns":>10} {"author ns":>10} {"title ns":>10}')
+    for size in args.sizes:
+        library = build_library(size)
+        rows = [random.randrange(size) for _ in range(QUERIES)]
+        isbn = per_lookup_ns(library.find_book, [f'{n:013d}' for n in rows])
+        author = per_lookup_ns(library.books_by_author, [f'Author {n // 20}' for n in rows])
+        title = per_lookup_ns(library.books_by_title, [f'Title {n}' for n in rows])
+        print(f'{size:>10} {isbn:>10.0f} {author:>10.0f} {title:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
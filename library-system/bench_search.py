@@ -0,0 +1,51 @@
+''' Query latency of the inverted index versus a substring scan.
+
+    > python bench_search.py
+    > python bench_search.py --sizes 1000 100000
+
+    The naive query is: [b for b in library.books.values() if q in b.title]
+'''
+import argparse
+import random
+import time
+
+from library import Book, Library
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+WORDS = [f'{syllable}{n}' for syllable in ('ka', 'lo', 'mi', 'su', 're') for n in range(2_000)]
+QUERIES = 200
+
+
+def build_library(size: int) -> Library:
+    random.seed(size)
+    library = Library('benchmark')
+    for n in range(size):
+        title = ' '.join(random.choices(WORDS, k=random.randint(2, 6)))
+        library.add_book(Book(title, f'Author {n // 20}', f'{n:013d}'))
+    return library
+
+
+def per_query_us(search, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+
+    print(f'{"books":>10} {"naive us":>12} {"bm25 us":>10} {"prefix us":>10}')
+    for size in args.sizes:
+        library = build_library(size)
+        queries = random.sample(WORDS, QUERIES)
+        naive = per_query_us(lambda q: [b for b in library.books.values() if q in b.title], queries)
+        ranked = per_query_us(library.search, queries)
+        prefix = per_query_us(lambda q: library.search(q[:3], prefix=True), queries)
+        print(f'{size:>10} {naive:>12.1f} {ranked:>10.1f} {prefix:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+''' Startup time of an mmap snapshot versus rebuilding the Library.
+
+    > python bench_snapshot.py
+    > python bench_snapshot.py --sizes 10000 100000 --path /tmp/library.snap
+
+    open / lookup   | The read only Snapshot.
+    load            | Snapshot.load, the Library used by restore to apply the journal.
+    search          | The first Library.search after load, which builds the full text index.
+'''
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from library import Book, Library
+from snapshot import Snapshot, write_snapshot
+
+SIZES = [100_000, 1_000_000, 5_000_000]
+LOOKUPS = 1_000
+
+
+def build_library(size: int) -> Library:
+    library = Library('benchmark')
+    for n in range(size):
+        library.add_book(Book(f'Title {n}', f'Author {n // 20}', f'{n:013d}'))
+    return library
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--path', default=os.path.join(tempfile.gettempdir(), 'bench_library.snap'))
+    args = parser.parse_args()
+
+    print(f'{"books":>10} {"file MB":>8} {"build s":>8} {"open ms":>8} {"lookup us":>10} {"load s":>8} {"search s":>8}')
+    for size in args.sizes:
+        start = time.perf_counter()
+        write_snapshot(build_library(size), args.path)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        snapshot = Snapshot(args.path)
+        opened = (time.perf_counter() - start) * 1e3
+
+        isbns = [f'{random.randrange(size):013d}' for _ in range(LOOKUPS)]
+        start = time.perf_counter()
+        for isbn in isbns:
+            snapshot.book(isbn)
+        lookup = (time.perf_counter() - start) / LOOKUPS * 1e6
+
+        start = time.perf_counter()
+        library = snapshot.load()
+        load = time.perf_counter() - start
+        snapshot.close()
+
+        start = time.perf_counter()
+        library.search('title 1')
+        search = time.perf_counter() - start
+        del library
+
+        megabytes = os.path.getsize(args.path) / 2**20
+        print(f'{size:>10} {megabytes:>8.1f} {build:>8.2f} {opened:>8.3f} {lookup:>10.1f} {load:>8.2f} {search:>8.2f}')
+    os.remove(args.path)
+
+
+if __name__ == '__main__':
+    main()
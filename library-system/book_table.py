@@ -0,0 +1,155 @@
+from array import array
+
+from isbn import pack_isbn, unpack_isbn
+from library import DuplicateBook, UnknownBook
+
+# Fibonacci hashing multiplier: spreads packed ISBNs over the index slots.
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+# The index grows once more than 3 / 4 of its slots are used.
+MAX_LOAD = 0.75
+
+
+class BookTable:
+    ''' Columnar, append-only book storage for very large catalogs.
+
+        Each column is a compact array rather than one object per book:
+            isbns     | ISBNs packed into unsigned 64 bit integers.
+            authors   | Indexes into a list of interned author names.
+            titles    | UTF-8 titles stored back to back in one bytearray,
+                        located using an array of end offsets.
+            available | A bitset with one bit per book.
+
+        Rows are addressed by position. BookView objects provide the
+        same attributes as Book without copying the row.
+
+        ISBNs are unique. find uses an open addressing hash index: an array
+        of row numbers whose keys are read from the isbns column, costing
+        4 bytes per slot rather than a dict entry and two int objects.
+    '''
+
+    def __init__(self):
+        self._isbns = array('Q')
+        self._authors = array('I')
+        self._author_names = []
+        self._author_ids = {}
+        self._title_ends = array('Q')
+        self._titles = bytearray()
+        self._available = bytearray()
+        # Slot -> row + 1, with 0 marking an empty slot. Probed linearly.
+        self._index = array('I', [0]) * 8
+        self._index_bits = 3
+
+    def __len__(self):
+        return len(self._isbns)
+
+    def __getitem__(self, row: int) -> 'BookView':
+        if not 0 <= row < len(self):
+            raise IndexError('BookTable index out of range')
+        return BookView(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield BookView(self, row)
+
+    def _slot(self, packed: int) -> int:
+        ''' Return the index slot holding packed, or the empty slot where it belongs. '''
+        mask = len(self._index) - 1
+        slot = ((packed * HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - self._index_bits)
+        while True:
+            row = self._index[slot]
+            if not row or self._isbns[row - 1] == packed:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        self._index_bits += 1
+        self._index = array('I', [0]) * (1 << self._index_bits)
+        for row, packed in enumerate(self._isbns):
+            self._index[self._slot(packed)] = row + 1
+
+    def append(self, title: str, author: str, isbn: str) -> int:
+        ''' Add a book and return its row number. New books are available. '''
+        packed = pack_isbn(isbn)
+        slot = self._slot(packed)
+        if self._index[slot]:
+            raise DuplicateBook(f'A book with ISBN {isbn} already exists.')
+        row = len(self)
+        self._index[slot] = row + 1
+        self._isbns.append(packed)
+        # Intern the author so repeated names share one string.
+        author_id = self._author_ids.get(author)
+        if author_id is None:
+            author_id = self._author_ids[author] = len(self._author_names)
+            self._author_names.append(author)
+        self._authors.append(author_id)
+        self._titles += title.encode()
+        self._title_ends.append(len(self._titles))
+        if row % 8 == 0:
+            self._available.append(0)
+        self.set_available(row, True)
+        if len(self) > MAX_LOAD * len(self._index):
+            self._grow()
+        return row
+
+    def find(self, isbn: str) -> 'BookView':
+        ''' Locate a book by ISBN in constant time. '''
+        try:
+            row = self._index[self._slot(pack_isbn(isbn))]
+        except ValueError:
+            # Not an ISBN, so it can't be in the table.
+            row = 0
+        if not row:
+            raise UnknownBook(f'No book with ISBN {isbn}.')
+        return BookView(self, row - 1)
+
+    def title(self, row: int) -> str:
+        start = self._title_ends[row - 1] if row else 0
+        return self._titles[start:self._title_ends[row]].decode()
+
+    def author(self, row: int) -> str:
+        return self._author_names[self._authors[row]]
+
+    def isbn(self, row: int) -> str:
+        return unpack_isbn(self._isbns[row])
+
+    def is_available(self, row: int) -> bool:
+        return bool(self._available[row >> 3] & (1 << (row & 7)))
+
+    def set_available(self, row: int, available: bool):
+        if available:
+            self._available[row >> 3] |= 1 << (row & 7)
+        else:
+            self._available[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+
+class BookView:
+    ''' A lightweight, Book-like view of one BookTable row. '''
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: BookTable, row: int):
+        self._table = table
+        self._row = row
+
+    @property
+    def title(self):
+        return self._table.title(self._row)
+
+    @property
+    def author(self):
+        return self._table.author(self._row)
+
+    @property
+    def isbn(self):
+        return self._table.isbn(self._row)
+
+    @property
+    def is_available(self):
+        return self._table.is_available(self._row)
+
+    @is_available.setter
+    def is_available(self, available):
+        self._table.set_available(self._row, available)
+
+    def __repr__(self):
+        return f'<Book {self.title} by {self.author}>'
@@ -0,0 +1,116 @@
+''' Streaming catalog importer.
+
+    > python importer.py catalog.csv
+    > python importer.py catalog.jsonl --chunk-size 50000
+
+    Rows flow through a generator pipeline one chunk at a time:
+        read rows -> chunk -> validate ISBNs -> dedupe -> add to the Library
+    so the input file is never held in memory. Each chunk is added with one
+    Library.add_books call.
+    Rows require title, author and isbn fields.
+'''
+import argparse
+import csv
+import json
+import resource
+import time
+from dataclasses import dataclass
+from itertools import islice
+
+from isbn import clean_isbn, is_valid_isbn
+from library import Book, Library
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def peak_rss_mb(self) -> float:
+        # ru_maxrss is reported in kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def __str__(self):
+        return (f'{self.rows} rows, {self.imported} imported, {self.duplicates} duplicates, '
+                f'{self.invalid} invalid in {self.seconds:.2f}s '
+                f'({self.rows_per_second:,.0f} rows/s, peak RSS {self.peak_rss_mb:.1f} MB)')
+
+
+def read_rows(path):
+    ''' Yield one dict per row of a .csv or .jsonl file. '''
+    with open(path, newline='', encoding='utf-8') as file:
+        if str(path).endswith('.csv'):
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def chunked(rows, size: int):
+    ''' Group an iterable into lists of at most size items. '''
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def validate(chunks, stats: ImportStats):
+    ''' Drop rows with missing fields or bad ISBN check digits. '''
+    for chunk in chunks:
+        stats.rows += len(chunk)
+        valid = [
+            Book(row['title'], row['author'], clean_isbn(row['isbn']))
+            for row in chunk
+            if row.get('title') and row.get('author') and row.get('isbn') and is_valid_isbn(row['isbn'])
+        ]
+        stats.invalid += len(chunk) - len(valid)
+        yield valid
+
+
+def dedupe(chunks, library: Library, stats: ImportStats):
+    ''' Drop books whose ISBN is already cataloged or repeated within the chunk. '''
+    for chunk in chunks:
+        unique = {}
+        for book in chunk:
+            if book.isbn not in library.books:
+                unique.setdefault(book.isbn, book)
+        stats.duplicates += len(chunk) - len(unique)
+        yield unique.values()
+
+
+def import_catalog(library: Library, path, chunk_size=10_000, progress=None) -> ImportStats:
+    ''' Stream the rows of path into library.
+
+        Args:
+            library     | The Library to add books to.
+            path        | A .csv or .jsonl file.
+            chunk_size  | The number of rows processed at a time.
+            progress    | Optional callable passed the ImportStats after each chunk.
+    '''
+    stats = ImportStats()
+    start = time.perf_counter()
+    pipeline = dedupe(validate(chunked(read_rows(path), chunk_size), stats), library, stats)
+    for books in pipeline:
+        library.add_books(books)
+        stats.imported += len(books)
+        stats.seconds = time.perf_counter() - start
+        if progress:
+            progress(stats)
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    args = parser.parse_args()
+    print(import_catalog(Library('import'), args.path, args.chunk_size, progress=print))
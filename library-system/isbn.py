@@ -0,0 +1,44 @@
+''' Helpers for converting ISBNs to and from a compact integer form.
+
+    ISBN-13 values fit into 44 bits. ISBN-10 values are stored with a flag bit
+    and their check digit (0-10, where 10 is the X check digit) kept separate
+    so both forms round trip. Hyphens and spaces are not preserved.
+'''
+
+# Set on packed values created from an ISBN-10.
+ISBN10_FLAG = 1 << 62
+
+
+def clean_isbn(isbn: str) -> str:
+    ''' Remove hyphens / spaces and upper case the X check digit. '''
+    return isbn.replace('-', '').replace(' ', '').upper()
+
+
+def pack_isbn(isbn: str) -> int:
+    ''' Convert an ISBN-10 or ISBN-13 string into an unsigned 64 bit integer. '''
+    digits = clean_isbn(isbn)
+    if len(digits) == 13 and digits.isdigit():
+        return int(digits)
+    if len(digits) == 10 and digits[:9].isdigit() and (digits[9].isdigit() or digits[9] == 'X'):
+        check = 10 if digits[9] == 'X' else int(digits[9])
+        return ISBN10_FLAG | (int(digits[:9]) * 11 + check)
+    raise ValueError(f'{isbn!r} is not an ISBN-10 or ISBN-13.')
+
+
+def unpack_isbn(value: int) -> str:
+    ''' Convert a value created by pack_isbn back into an ISBN string. '''
+    if value & ISBN10_FLAG:
+        body, check = divmod(value & ~ISBN10_FLAG, 11)
+        return f'{body:09d}{"X" if check == 10 else check}'
+    return f'{value:013d}'
+
+
+def is_valid_isbn(isbn: str) -> bool:
+    ''' Return True if isbn is an ISBN-10 or ISBN-13 with a correct check digit. '''
+    digits = clean_isbn(isbn)
+    if len(digits) == 13 and digits.isdigit():
+        return sum(int(digit) * (3 if position % 2 else 1) for position, digit in enumerate(digits)) % 10 == 0
+    if len(digits) == 10 and digits[:9].isdigit() and (digits[9].isdigit() or digits[9] == 'X'):
+        check = 10 if digits[9] == 'X' else int(digits[9])
+        return (sum(int(digit) * (10 - position) for position, digit in enumerate(digits[:9])) + check) % 11 == 0
+    return False
@@ -1,4 +1,40 @@
+import threading
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from datetime import date, timedelta
+
+from loans import LoanLedger
+from locking import NO_LOCK, LockStripes, no_lock
+from search import SearchIndex
+
+
+class DuplicateBook(Exception):
+    ''' Exception raised if a book with the same ISBN is already cataloged. '''
+
+class UnknownBook(Exception):
+    ''' Exception raised if an ISBN is not found in the catalog. '''
+
+class BookOnLoan(Exception):
+    ''' Exception raised if a book is removed while it is on loan. '''
+
+class DuplicateMember(Exception):
+    ''' Exception raised if a member with the same member_id already exists. '''
+
+class UnknownMember(Exception):
+    ''' Exception raised if a member_id is not found. '''
+
+
+def normalize(text: str) -> str:
+    ''' Normalize a title or author for index lookups.
+        Case and repeated whitespace are ignored: " The  Hobbit" == "the hobbit"
+    '''
+    return ' '.join(text.casefold().split())
+
+
 class Book:
+    # __slots__ drops the per-instance __dict__.
+    __slots__ = ('title', 'author', 'isbn', 'is_available')
+
     def __init__(self,title,author,isbn):
         self.title = title
         self.author = author
@@ -9,6 +45,8 @@ class Book:
         return f'<Book {self.title} by {self.author}>'
 
 class Member:
+    __slots__ = ('name', 'member_id')
+
     def __init__(self,name, member_id: int):
         self.name = name
         self.member_id = member_id
@@ -16,9 +54,226 @@ class Member:
 
 
 class Library:
-    def __init__(self,name ):
+    ''' A library catalog indexed for constant time lookups.
+
+        books and members are dictionaries keyed by ISBN and member_id.
+        Secondary indexes map the normalized author / title to the books
+        sharing that value. The indexes are maintained by the add / remove
+        methods, so books should not be renamed once they are cataloged.
+
+        When a journal is attached (see snapshot.Journal) every change made
+        through the methods below is appended to it.
+
+        Args:
+            name        | The library name.
+            thread_safe | Synchronize changes so one Library can be shared
+                          between threads. Checkouts lock a stripe for the
+                          book and one for the member, so checkouts of
+                          different books rarely wait on each other.
+                          Catalog changes and full text searches share
+                          one lock.
+            stripes     | The number of book and member locks when thread_safe.
+            loan_period | Passed to the LoanLedger.
+            max_loans   | Passed to the LoanLedger.
+    '''
+
+    def __init__(self,name, thread_safe=False, stripes=64, loan_period=timedelta(days=14), max_loans=5):
         self.name = name
-        self.books = []
-        self.members = []
-        self.loans = []
+        # isbn -> Book
+        self.books = {}
+        # member_id -> Member
+        self.members = {}
+        if thread_safe:
+            self._book_lock = LockStripes(stripes)
+            self._member_lock = LockStripes(stripes)
+            self._catalog_lock = threading.Lock()
+            self.loans = LoanLedger(loan_period, max_loans, lock=threading.Lock())
+        else:
+            self._book_lock = self._member_lock = no_lock
+            self._catalog_lock = NO_LOCK
+            self.loans = LoanLedger(loan_period, max_loans)
+        # normalized author / title -> {isbn: Book}
+        # A dict is used for the inner mapping to keep insertion order
+        # and allow removals without scanning.
+        self._by_author = defaultdict(dict)
+        self._by_title = defaultdict(dict)
+        # Built on the first search after populate, see _search_index.
+        self._search = SearchIndex()
+        self.journal = None
+
+    def _record(self, operation, **fields):
+        if self.journal is not None:
+            self.journal.record(operation, **fields)
+
+    def add_book(self, book: Book):
+        # Lock order: book stripe, then the catalog. The book stripe keeps a
+        # checkout of the new book from being journaled before the book is.
+        with self._book_lock(book.isbn), self._catalog_lock:
+            if book.isbn in self.books:
+                raise DuplicateBook(f'A book with ISBN {book.isbn} already exists.')
+            self.books[book.isbn] = book
+            self._by_author[normalize(book.author)][book.isbn] = book
+            self._by_title[normalize(book.title)][book.isbn] = book
+            if self._search is not None:
+                self._search.add(book)
+            self._record('add_book', title=book.title, author=book.author, isbn=book.isbn)
+
+    def add_books(self, books):
+        ''' Add many books at once, e.g. a chunk of an import.
+
+            Equivalent to add_book for each book, but the catalog lock is
+            taken once and the search index is updated with add_many.
+            If any ISBN is already cataloged or repeated, DuplicateBook is
+            raised and no book is added.
+        '''
+        books = list(books)
+        with self._catalog_lock:
+            isbns = set()
+            for book in books:
+                if book.isbn in self.books or book.isbn in isbns:
+                    raise DuplicateBook(f'A book with ISBN {book.isbn} already exists.')
+                isbns.add(book.isbn)
+            # Journaled before the books can be found, so checkouts of them
+            # are journaled after them without taking every book stripe.
+            for book in books:
+                self._record('add_book', title=book.title, author=book.author, isbn=book.isbn)
+            for book in books:
+                self.books[book.isbn] = book
+                self._by_author[normalize(book.author)][book.isbn] = book
+                self._by_title[normalize(book.title)][book.isbn] = book
+            if self._search is not None:
+                self._search.add_many(books)
+
+    def remove_book(self, isbn) -> Book:
+        # Lock order: book stripe, then the catalog.
+        with self._book_lock(isbn), self._catalog_lock:
+            # Checkouts and returns hold the book stripe, so the loan can't change here.
+            if isbn in self.loans:
+                raise BookOnLoan(f'{isbn} is on loan and can not be removed.')
+            try:
+                book = self.books.pop(isbn)
+            except KeyError:
+                raise UnknownBook(f'No book with ISBN {isbn}.')
+            self._unindex(self._by_author, normalize(book.author), isbn)
+            self._unindex(self._by_title, normalize(book.title), isbn)
+            if self._search is not None:
+                self._search.remove(book)
+            self._record('remove_book', isbn=isbn)
+            return book
+
+    def populate(self, books: dict, members: dict, by_author: dict = None, by_title: dict = None):
+        ''' Fill an empty library in bulk, e.g. from a snapshot. Nothing is journaled.
+
+            Skips the per book work of add_book. The full text search index
+            is built on the first search or complete instead.
+
+            Args:
+                books       | isbn -> Book. Used as the books dictionary.
+                members     | member_id -> Member. Used as the members dictionary.
+                by_author   | Normalized author -> {isbn: Book}. Built from books when omitted.
+                by_title    | Normalized title -> {isbn: Book}. Built from books when omitted.
+        '''
+        with self._catalog_lock:
+            if self.books or self.members:
+                raise ValueError('Only an empty library can be populated.')
+            self.books = books
+            self.members = members
+            for index, field, prebuilt in ((self._by_author, 'author', by_author),
+                                           (self._by_title, 'title', by_title)):
+                if prebuilt is not None:
+                    index.update(prebuilt)
+                    continue
+                for book in books.values():
+                    index[normalize(getattr(book, field))][book.isbn] = book
+            self._search = None
+
+    def _search_index(self) -> SearchIndex:
+        # Called with the catalog lock held.
+        if self._search is None:
+            self._search = SearchIndex()
+            self._search.add_many(self.books.values())
+        return self._search
+
+    @contextmanager
+    def exclusive(self):
+        ''' Hold every lock of a thread safe library, so no other thread changes it
+            inside the with block. Used to write a snapshot matching the journal.
+        '''
+        with ExitStack() as stack:
+            # The same order as the methods below: member stripes, book stripes, catalog.
+            for stripes in (self._member_lock, self._book_lock):
+                for lock in stripes if isinstance(stripes, LockStripes) else ():
+                    stack.enter_context(lock)
+            stack.enter_context(self._catalog_lock)
+            yield
+
+    @staticmethod
+    def _unindex(index, key, isbn):
+        books = index[key]
+        del books[isbn]
+        # Drop empty buckets so the index doesn't grow with removed values.
+        if not books:
+            del index[key]
+
+    def find_book(self, isbn) -> Book:
+        try:
+            return self.books[isbn]
+        except KeyError:
+            raise UnknownBook(f'No book with ISBN {isbn}.')
+
+    def books_by_author(self, author: str) -> list:
+        # .get avoids inserting empty buckets into the defaultdict.
+        return list(self._by_author.get(normalize(author), {}).values())
+
+    def books_by_title(self, title: str) -> list:
+        return list(self._by_title.get(normalize(title), {}).values())
+
+    def search(self, query: str, limit=10, prefix=False) -> list:
+        ''' Full text search over titles and authors. Returns Books ranked by relevance. '''
+        with self._catalog_lock:
+            return [self.books[isbn] for isbn, _ in self._search_index().search(query, limit, prefix)]
+
+    def complete(self, prefix: str, limit=10) -> list:
+        ''' Autocomplete a single word from the catalog vocabulary. '''
+        with self._catalog_lock:
+            return self._search_index().complete(prefix, limit)
+
+    def checkout(self, isbn, member_id, today: date = None):
+        ''' Loan the book with the provided ISBN to a member. Returns the Loan. '''
+        # Lock order: member stripe, then book stripe.
+        # The member lock makes the borrow limit check and the new loan atomic.
+        with self._member_lock(member_id), self._book_lock(isbn):
+            book = self.find_book(isbn)
+            self.find_member(member_id)
+            loan = self.loans.checkout(book, member_id, today)
+            self._record('checkout', isbn=isbn, member_id=member_id, due=loan.due.isoformat())
+            return loan
+
+    def return_book(self, isbn):
+        # Returns only lower a member's loan count so the member lock isn't needed.
+        with self._book_lock(isbn):
+            loan = self.loans.return_book(self.find_book(isbn))
+            self._record('return_book', isbn=isbn)
+            return loan
+
+    def add_member(self, member: Member):
+        with self._member_lock(member.member_id):
+            if member.member_id in self.members:
+                raise DuplicateMember(f'A member with id {member.member_id} already exists.')
+            self.members[member.member_id] = member
+            self._record('add_member', name=member.name, member_id=member.member_id)
+
+    def remove_member(self, member_id) -> Member:
+        with self._member_lock(member_id):
+            try:
+                member = self.members.pop(member_id)
+            except KeyError:
+                raise UnknownMember(f'No member with id {member_id}.')
+            self._record('remove_member', member_id=member_id)
+            return member
 
+    def find_member(self, member_id) -> Member:
+        try:
+            return self.members[member_id]
+        except KeyError:
+            raise UnknownMember(f'No member with id {member_id}.')
@@ -0,0 +1,150 @@
+import heapq
+import itertools
+from collections import defaultdict
+from datetime import date, timedelta
+
+from locking import NO_LOCK
+
+
+class BookUnavailable(Exception):
+    ''' Exception raised when checking out a book which is already on loan. '''
+
+class BorrowLimitReached(Exception):
+    ''' Exception raised when a member already has the maximum number of loans. '''
+
+class UnknownLoan(Exception):
+    ''' Exception raised when returning a book which isn't on loan. '''
+
+
+class Loan:
+    __slots__ = ('isbn', 'member_id', 'due', 'returned')
+
+    def __init__(self, isbn, member_id, due: date):
+        self.isbn = isbn
+        self.member_id = member_id
+        self.due = due
+        self.returned = False
+
+    def __repr__(self):
+        return f'<Loan {self.isbn} to {self.member_id} due {self.due}>'
+
+
+class LoanLedger:
+    ''' Tracks active loans.
+
+        Loans are kept in a min-heap ordered by due date. Returned loans are
+        marked and left in the heap (lazy deletion) and the heap is rebuilt
+        once returned loans outnumber active ones.
+
+        The heap is read in due date order without popping by walking it
+        best-first: a small frontier heap holds the positions whose parents
+        have already been visited. Reading k loans costs O(k log k).
+
+        Args:
+            loan_period | The time between checkout and the due date.
+            max_loans   | The maximum number of loans per member.
+            lock        | Optional lock guarding the heap and indexes. It is
+                          held only while they are updated or read.
+    '''
+
+    def __init__(self, loan_period=timedelta(days=14), max_loans=5, lock=None):
+        self.loan_period = loan_period
+        self.max_loans = max_loans
+        self._lock = lock or NO_LOCK
+        # (due, sequence, Loan). The sequence breaks ties so Loans are never compared.
+        self._heap = []
+        self._sequence = itertools.count()
+        # Number of returned loans still in the heap.
+        self._stale = 0
+        # isbn -> Loan
+        self._active = {}
+        # member_id -> {isbn: Loan}
+        self._by_member = defaultdict(dict)
+
+    def __len__(self):
+        return len(self._active)
+
+    def __iter__(self):
+        return iter(self._active.values())
+
+    def __contains__(self, isbn):
+        return isbn in self._active
+
+    def checkout(self, book, member_id, today: date = None, due: date = None) -> Loan:
+        ''' Loan a book to a member and mark it as unavailable.
+
+            Args:
+                book        | The Book to loan.
+                member_id   | The id of the borrowing member.
+                today       | The checkout date. Defaults to date.today().
+                due         | The due date. Defaults to today + loan_period.
+        '''
+        if not book.is_available or book.isbn in self._active:
+            raise BookUnavailable(f'{book.isbn} is already on loan.')
+        if self.loan_count(member_id) >= self.max_loans:
+            raise BorrowLimitReached(f'Member {member_id} has {self.max_loans} loans.')
+        return self._restore(book, member_id, due or (today or date.today()) + self.loan_period)
+
+    def _restore(self, book, member_id, due: date) -> Loan:
+        # Records a loan which was checked when it was made, e.g. from a
+        # snapshot or journal. The borrow limit may have changed since.
+        loan = Loan(book.isbn, member_id, due)
+        with self._lock:
+            heapq.heappush(self._heap, (loan.due, next(self._sequence), loan))
+            self._active[book.isbn] = loan
+            self._by_member[member_id][book.isbn] = loan
+        book.is_available = False
+        return loan
+
+    def return_book(self, book) -> Loan:
+        with self._lock:
+            try:
+                loan = self._active.pop(book.isbn)
+            except KeyError:
+                raise UnknownLoan(f'{book.isbn} is not on loan.')
+            member_loans = self._by_member[loan.member_id]
+            del member_loans[book.isbn]
+            if not member_loans:
+                del self._by_member[loan.member_id]
+            loan.returned = True
+            self._stale += 1
+            if self._stale > len(self._active):
+                self._compact()
+        book.is_available = True
+        return loan
+
+    def loan_count(self, member_id) -> int:
+        loans = self._by_member.get(member_id)
+        return len(loans) if loans else 0
+
+    def loans_for(self, member_id) -> list:
+        with self._lock:
+            return list(self._by_member.get(member_id, {}).values())
+
+    def overdue(self, today: date = None) -> list:
+        ''' Return the loans due before today, most overdue first. '''
+        today = today or date.today()
+        with self._lock:
+            return list(itertools.takewhile(lambda loan: loan.due < today, self._in_due_order()))
+
+    def next_due(self, n: int) -> list:
+        ''' Return the n loans with the earliest due dates. '''
+        with self._lock:
+            return list(itertools.islice(self._in_due_order(), n))
+
+    def _in_due_order(self):
+        heap = self._heap
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            entry, position = heapq.heappop(frontier)
+            loan = entry[2]
+            if not loan.returned:
+                yield loan
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if not entry[2].returned]
+        heapq.heapify(self._heap)
+        self._stale = 0
@@ -0,0 +1,31 @@
+import threading
+from contextlib import nullcontext
+
+# A reusable context manager which does nothing. Used when locking is disabled.
+NO_LOCK = nullcontext()
+
+
+def no_lock(key):
+    return NO_LOCK
+
+
+class LockStripes:
+    ''' A fixed pool of locks shared between keys.
+
+        Each key hashes onto one of the locks, so operations on different
+        keys rarely wait on each other while the number of locks stays
+        constant regardless of the number of keys.
+
+        Args:
+            count | The number of locks in the pool.
+    '''
+
+    def __init__(self, count=64):
+        self._locks = [threading.Lock() for _ in range(count)]
+
+    def __call__(self, key) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    def __iter__(self):
+        ''' Iterate over every lock, always in the same order. '''
+        return iter(self._locks)
@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+WORDS = re.compile(r'\w+')
+# The maximum number of vocabulary terms a prefix is expanded into.
+MAX_EXPANSIONS = 50
+
+
+def tokenize(text: str) -> list:
+    ''' Split text into lower case word tokens. '''
+    return WORDS.findall(text.casefold())
+
+
+class SearchIndex:
+    ''' An in-memory inverted index over book titles and authors.
+
+        Each token maps to the ISBNs of the books containing it along with
+        the number of occurrences. Results are ranked using Okapi BM25.
+        A sorted vocabulary supports prefix searches for autocomplete. It is
+        rebuilt on the first prefix search after tokens are added or removed,
+        so building the index costs one sort rather than one insert per token.
+
+        Args:
+            k1  | BM25 term frequency saturation.
+            b   | BM25 document length normalization.
+    '''
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        # token -> {isbn: term frequency}
+        self._postings = defaultdict(dict)
+        # isbn -> number of tokens in the book
+        self._lengths = {}
+        self._total_length = 0
+        # Sorted list of every indexed token. None when tokens have been
+        # added or removed since it was sorted, see _sorted_vocabulary.
+        self._vocabulary = []
+
+    def __len__(self):
+        return len(self._lengths)
+
+    @staticmethod
+    def _tokens(book) -> Counter:
+        return Counter(tokenize(book.title) + tokenize(book.author))
+
+    def add(self, book):
+        tokens = self._tokens(book)
+        for token, frequency in tokens.items():
+            postings = self._postings[token]
+            if not postings:
+                self._vocabulary = None
+            postings[book.isbn] = frequency
+        length = sum(tokens.values())
+        self._lengths[book.isbn] = length
+        self._total_length += length
+
+    def add_many(self, books):
+        ''' Add books in bulk. Equivalent to calling add for each book. '''
+        for book in books:
+            tokens = self._tokens(book)
+            for token, frequency in tokens.items():
+                self._postings[token][book.isbn] = frequency
+            length = sum(tokens.values())
+            self._lengths[book.isbn] = length
+            self._total_length += length
+        self._vocabulary = None
+
+    def remove(self, book):
+        for token in self._tokens(book):
+            postings = self._postings[token]
+            postings.pop(book.isbn, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+        self._total_length -= self._lengths.pop(book.isbn)
+
+    def complete(self, prefix: str, limit=10) -> list:
+        ''' Return up to limit indexed tokens beginning with prefix. '''
+        prefix = prefix.casefold()
+        vocabulary = self._sorted_vocabulary()
+        matches = []
+        for token in itertools.islice(vocabulary, bisect_left(vocabulary, prefix), None):
+            if not token.startswith(prefix) or len(matches) == limit:
+                break
+            matches.append(token)
+        return matches
+
+    def _sorted_vocabulary(self) -> list:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        return self._vocabulary
+
+    def search(self, query: str, limit=10, prefix=False) -> list:
+        ''' Return up to limit (isbn, score) pairs, best match first.
+
+            Args:
+                query   | Free text to search for.
+                limit   | The maximum number of results.
+                prefix  | Treat the final query token as a prefix. Used for
+                          search as you type.
+        '''
+        tokens = tokenize(query)
+        if not tokens or not self._lengths:
+            return []
+        terms = [[token] for token in tokens]
+        if prefix:
+            terms[-1] = self.complete(tokens[-1], MAX_EXPANSIONS)
+
+        scores = defaultdict(float)
+        count = len(self._lengths)
+        average_length = self._total_length / count
+        for alternatives in terms:
+            for token in alternatives:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for isbn, frequency in postings.items():
+                    norm = 1 - self.b + self.b * self._lengths[isbn] / average_length
+                    scores[isbn] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
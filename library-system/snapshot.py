@@ -0,0 +1,330 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from datetime import date
+
+from library import Book, Library, Member, UnknownBook, UnknownMember, normalize
+
+MAGIC = b'LIBSNAP1'
+# magic, book / member / loan counts, offsets of the book, member, loan,
+# author index, title index and string sections, library name.
+HEADER = struct.Struct('<8s9QQI')
+# Strings are stored once in the string section and referenced by (offset, length).
+# isbn, title, author, is_available
+BOOK = struct.Struct('<QIQIQIB')
+# member_id, name
+MEMBER = struct.Struct('<qQI')
+# isbn, member_id, due date ordinal
+LOAN = struct.Struct('<QIqI')
+# normalized author or title, book row
+INDEX = struct.Struct('<QII')
+
+
+class _Strings:
+    ''' Builds the string section, storing repeated strings once. '''
+
+    def __init__(self):
+        self.data = bytearray()
+        self._refs = {}
+
+    def add(self, text: str) -> tuple:
+        ref = self._refs.get(text)
+        if ref is None:
+            encoded = text.encode()
+            ref = self._refs[text] = (len(self.data), len(encoded))
+            self.data += encoded
+        return ref
+
+
+def write_snapshot(library: Library, path):
+    ''' Write the books, members, loans and indexes of a library to path.
+
+        Books are sorted by ISBN and members by member_id so a Snapshot can
+        binary search them. The author and title indexes are stored as
+        (normalized value, book row) records sorted by value.
+        The file is written next to path and renamed into place.
+    '''
+    strings = _Strings()
+    books = sorted(library.books.values(), key=lambda book: book.isbn)
+    members = sorted(library.members.values(), key=lambda member: member.member_id)
+
+    book_section = bytearray()
+    for book in books:
+        book_section += BOOK.pack(*strings.add(book.isbn), *strings.add(book.title),
+                                  *strings.add(book.author), book.is_available)
+    member_section = bytearray()
+    for member in members:
+        member_section += MEMBER.pack(member.member_id, *strings.add(member.name))
+    loan_section = bytearray()
+    for loan in library.loans:
+        loan_section += LOAN.pack(*strings.add(loan.isbn), loan.member_id, loan.due.toordinal())
+    index_sections = []
+    for field in ('author', 'title'):
+        keys = sorted((normalize(getattr(book, field)), row) for row, book in enumerate(books))
+        index_sections.append(b''.join(INDEX.pack(*strings.add(key), row) for key, row in keys))
+    name = strings.add(library.name)
+
+    sections = [book_section, member_section, loan_section, *index_sections, strings.data]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(books), len(members), len(library.loans), *offsets, *name))
+        for section in sections:
+            file.write(section)
+    os.replace(temp_path, path)
+
+
+class Snapshot:
+    ''' Read only access to a snapshot file through mmap.
+
+        Opening a snapshot only reads the header. Lookups binary search the
+        sorted records, so only the pages they touch are read from disk.
+        Use load to build a full Library.
+    '''
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.book_count, self.member_count, self.loan_count,
+         self._books, self._members, self._loans, self._authors, self._titles,
+         self._strings, *name) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a library snapshot.')
+        self.name = self._string(*name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.book_count
+
+    def close(self):
+        self._map.close()
+
+    def _bytes(self, offset, length) -> bytes:
+        start = self._strings + offset
+        return self._map[start:start + length]
+
+    def _string(self, offset, length) -> str:
+        return self._bytes(offset, length).decode()
+
+    def _bisect(self, start, record, count, key: bytes) -> int:
+        ''' Return the first row whose leading string is >= key. '''
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._bytes(*record.unpack_from(self._map, start + middle * record.size)[:2]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _book(self, row) -> Book:
+        isbn_offset, isbn_length, *fields, available = BOOK.unpack_from(self._map, self._books + row * BOOK.size)
+        book = Book(self._string(*fields[:2]), self._string(*fields[2:]), self._string(isbn_offset, isbn_length))
+        book.is_available = bool(available)
+        return book
+
+    def book(self, isbn) -> Book:
+        row = self._bisect(self._books, BOOK, self.book_count, isbn.encode())
+        if row < self.book_count:
+            book = self._book(row)
+            if book.isbn == isbn:
+                return book
+        raise UnknownBook(f'No book with ISBN {isbn}.')
+
+    def _books_by(self, start, value) -> list:
+        key = normalize(value).encode()
+        books = []
+        row = self._bisect(start, INDEX, self.book_count, key)
+        while row < self.book_count:
+            offset, length, book_row = INDEX.unpack_from(self._map, start + row * INDEX.size)
+            if self._bytes(offset, length) != key:
+                break
+            books.append(self._book(book_row))
+            row += 1
+        return books
+
+    def books_by_author(self, author: str) -> list:
+        return self._books_by(self._authors, author)
+
+    def books_by_title(self, title: str) -> list:
+        return self._books_by(self._titles, title)
+
+    def member(self, member_id) -> Member:
+        low, high = 0, self.member_count
+        while low < high:
+            middle = (low + high) // 2
+            found, *name = MEMBER.unpack_from(self._map, self._members + middle * MEMBER.size)
+            if found == member_id:
+                return Member(self._string(*name), found)
+            if found < member_id:
+                low = middle + 1
+            else:
+                high = middle
+        raise UnknownMember(f'No member with id {member_id}.')
+
+    def books(self):
+        for row in range(self.book_count):
+            yield self._book(row)
+
+    def members(self):
+        for member_id, *name in MEMBER.iter_unpack(self._map[self._members:self._loans]):
+            yield Member(self._string(*name), member_id)
+
+    def loans(self):
+        ''' Yield (isbn, member_id, due) tuples. '''
+        for isbn_offset, isbn_length, member_id, due in LOAN.iter_unpack(self._map[self._loans:self._authors]):
+            yield self._string(isbn_offset, isbn_length), member_id, date.fromordinal(due)
+
+    def load(self, **settings) -> Library:
+        ''' Build a Library containing everything in the snapshot.
+
+            Books, members and the author / title indexes are built straight
+            from the stored records rather than through add_book, and each
+            distinct author is decoded once. The full text search index is
+            built by the Library on its first search. Loans are restored
+            without checking the borrow limit.
+
+            Args:
+                settings    | Passed to Library, e.g. thread_safe or max_loans.
+        '''
+        strings = self._map[self._strings:]
+        authors = {}
+        rows = []
+        books = {}
+        for isbn_offset, isbn_length, title_offset, title_length, author_offset, author_length, _ \
+                in BOOK.iter_unpack(self._map[self._books:self._members]):
+            author = authors.get(author_offset)
+            if author is None:
+                author = authors[author_offset] = strings[author_offset:author_offset + author_length].decode()
+            # Availability is restored by the loans below.
+            book = Book(strings[title_offset:title_offset + title_length].decode(), author,
+                        strings[isbn_offset:isbn_offset + isbn_length].decode())
+            books[book.isbn] = book
+            rows.append(book)
+
+        indexes = []
+        for start, stop in ((self._authors, self._titles), (self._titles, self._strings)):
+            index = {}
+            # Records are sorted by value and equal values share one string offset.
+            previous = None
+            for offset, length, row in INDEX.iter_unpack(self._map[start:stop]):
+                if offset != previous:
+                    bucket = index[strings[offset:offset + length].decode()] = {}
+                    previous = offset
+                book = rows[row]
+                bucket[book.isbn] = book
+            indexes.append(index)
+
+        library = Library(self.name, **settings)
+        library.populate(books, {member.member_id: member for member in self.members()}, *indexes)
+        for isbn, member_id, due in self.loans():
+            library.loans._restore(books[isbn], member_id, due)
+        return library
+
+
+class Journal:
+    ''' An append-only log of the changes made to a Library since its last snapshot.
+
+        Each change is written as one line of JSON. Attach a journal by
+        setting Library.journal; restore replays it on top of a snapshot.
+
+        Args:
+            path    | The journal file. Created if missing.
+            fsync   | Call os.fsync after every record.
+    '''
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, 'a', encoding='utf-8')
+        # Records may come from several threads when the Library is thread safe.
+        self._lock = threading.Lock()
+
+    def record(self, operation, **fields):
+        line = json.dumps({'op': operation, **fields}) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def truncate(self):
+        with self._lock:
+            self._file.truncate(0)
+
+    def close(self):
+        self._file.close()
+
+    @staticmethod
+    def replay(path, library: Library):
+        ''' Apply the changes recorded in path to library.
+            A partially written last line, e.g. after a crash, is ignored.
+        '''
+        journal, library.journal = library.journal, None
+        try:
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    _apply(library, entry.pop('op'), entry)
+        finally:
+            library.journal = journal
+
+
+def _apply(library: Library, operation, fields):
+    if operation == 'add_book':
+        library.add_book(Book(fields['title'], fields['author'], fields['isbn']))
+    elif operation == 'remove_book':
+        library.remove_book(fields['isbn'])
+    elif operation == 'add_member':
+        library.add_member(Member(fields['name'], fields['member_id']))
+    elif operation == 'remove_member':
+        library.remove_member(fields['member_id'])
+    elif operation == 'checkout':
+        # The borrow limit was checked when the checkout was recorded.
+        book = library.find_book(fields['isbn'])
+        library.loans._restore(book, fields['member_id'], date.fromisoformat(fields['due']))
+    elif operation == 'return_book':
+        library.return_book(fields['isbn'])
+    else:
+        raise ValueError(f'unexpected journal operation: {operation}')
+
+
+def restore(snapshot_path, journal_path=None, **settings) -> Library:
+    ''' Load a snapshot, replay the journal and attach the journal for new changes.
+        settings are passed to Library, see Snapshot.load.
+    '''
+    with Snapshot(snapshot_path) as snapshot:
+        library = snapshot.load(**settings)
+    if journal_path is not None:
+        if os.path.exists(journal_path):
+            Journal.replay(journal_path, library)
+        library.journal = Journal(journal_path)
+    return library
+
+
+def checkpoint(library: Library, path):
+    ''' Write a new snapshot and empty the attached journal.
+
+        The library is held exclusively meanwhile, so no change can be
+        recorded between writing the snapshot and emptying the journal.
+    '''
+    with library.exclusive():
+        write_snapshot(library, path)
+        if library.journal is not None:
+            library.journal.truncate()
@@ -0,0 +1,27 @@
+import unittest
+
+from book_table import BookTable
+from library import DuplicateBook, UnknownBook
+
+
+class BookTableTests(unittest.TestCase):
+    def setUp(self):
+        self.table = BookTable()
+        for n in range(100):
+            self.table.append(f'Title {n}', f'Author {n // 10}', f'978{n:010d}')
+
+    def test_find(self):
+        ''' finds books by ISBN through the index, including after it grows '''
+        for n in range(100):
+            book = self.table.find(f'978{n:010d}')
+            self.assertEqual((book.title, book.author), (f'Title {n}', f'Author {n // 10}'))
+        with self.assertRaises(UnknownBook):
+            self.table.find('9789999999999')
+        with self.assertRaises(UnknownBook):
+            self.table.find('not an isbn')
+
+    def test_duplicate(self):
+        ''' rejects a second book with the same ISBN '''
+        with self.assertRaises(DuplicateBook):
+            self.table.append('Copy', 'Author', '978-0000000050')
+        self.assertEqual(len(self.table), 100)
@@ -0,0 +1,57 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from importer import import_catalog
+from library import Book, DuplicateBook, Library
+
+ROWS = [
+    ('The Hobbit', 'J. R. R. Tolkien', '978-0261103344'),
+    ('The Hobbit (copy)', 'J. R. R. Tolkien', '9780261103344'),
+    ('The Silmarillion', 'J. R. R. Tolkien', '9780261102737'),
+    ('Holes', 'Louis Sachar', '9780439244190'),
+    ('', 'No Title', '9780261102163'),
+    ('Hogfather', 'Terry Pratchett', '9780552167673'),
+    ('Holes (copy)', 'Louis Sachar', '9780439244190'),
+    ('Unfinished Tales', 'J. R. R. Tolkien', '9780261102163'),
+    ('The Lord of the Rings', 'J. R. R. Tolkien', '0261103342'),
+]
+
+
+class ImporterTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'catalog.csv')
+        with open(self.path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['title', 'author', 'isbn'])
+            writer.writerows(ROWS)
+        self.library = Library('test')
+        self.library.add_book(Book('Unfinished Tales', 'J. R. R. Tolkien', '9780261102163'))
+
+    def test_import(self):
+        ''' drops bad check digits, missing fields and duplicates within and across chunks '''
+        stats = import_catalog(self.library, self.path, chunk_size=3)
+        # Invalid: the Silmarillion check digit and the missing title.
+        # Duplicates: the Hobbit within its chunk, Holes across chunks and
+        # Unfinished Tales, which was already cataloged.
+        self.assertEqual((stats.rows, stats.imported, stats.invalid, stats.duplicates), (9, 4, 2, 3))
+        self.assertEqual(sorted(self.library.books), ['0261103342', '9780261102163', '9780261103344',
+                                                      '9780439244190', '9780552167673'])
+        self.assertEqual(self.library.find_book('9780261103344').title, 'The Hobbit')
+        self.assertEqual(self.library.find_book('9780439244190').title, 'Holes')
+        self.assertEqual(len(self.library.books_by_author('j. r. r. tolkien')), 3)
+        self.assertEqual([book.title for book in self.library.search('hogfather')], ['Hogfather'])
+
+    def test_add_books(self):
+        ''' adds nothing when any book is a duplicate '''
+        books = [Book('Holes', 'Louis Sachar', '9780439244190'),
+                 Book('Unfinished Tales', 'J. R. R. Tolkien', '9780261102163')]
+        with self.assertRaises(DuplicateBook):
+            self.library.add_books(books)
+        with self.assertRaises(DuplicateBook):
+            self.library.add_books([books[0], books[0]])
+        self.assertEqual(list(self.library.books), ['9780261102163'])
+        self.assertEqual(self.library.complete('hol'), [])
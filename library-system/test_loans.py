@@ -0,0 +1,81 @@
+import random
+import unittest
+from datetime import date, timedelta
+
+from library import Book
+from loans import BookUnavailable, BorrowLimitReached, LoanLedger, UnknownLoan
+
+TODAY = date(2024, 1, 1)
+
+
+class LoanLedgerTests(unittest.TestCase):
+    def setUp(self):
+        self.ledger = LoanLedger(max_loans=1000)
+        self.books = [Book(f'Title {n}', 'Author', f'978{n:010d}') for n in range(200)]
+
+    def expected(self):
+        return sorted(self.ledger, key=lambda loan: loan.due)
+
+    def test_due_order(self):
+        ''' reads loans in due date order across many returns and compactions '''
+        shuffle = random.Random(42)
+        for book in self.books:
+            self.ledger.checkout(book, shuffle.randrange(20), due=TODAY + timedelta(days=shuffle.randrange(60)))
+        on_loan = list(self.books)
+        shuffle.shuffle(on_loan)
+        while len(on_loan) > 15:
+            for _ in range(15):
+                self.ledger.return_book(on_loan.pop())
+            # Returned loans stay in the heap until they outnumber active ones.
+            self.assertLessEqual(self.ledger._stale, len(self.ledger))
+            expected = [loan.due for loan in self.expected()]
+            self.assertEqual([loan.due for loan in self.ledger.next_due(len(self.ledger) + 5)], expected)
+            self.assertEqual([loan.due for loan in self.ledger.next_due(3)], expected[:3])
+            self.assertEqual([loan.due for loan in self.ledger.overdue(TODAY + timedelta(days=30))],
+                             [due for due in expected if due < TODAY + timedelta(days=30)])
+            self.assertFalse(any(loan.returned for loan in self.ledger.next_due(len(self.ledger))))
+            # Checked out again between returns, so new loans join the walked heap.
+            book = self.books[len(on_loan)]
+            if book.is_available:
+                self.ledger.checkout(book, 0, due=TODAY + timedelta(days=len(on_loan) % 7))
+                on_loan.insert(0, book)
+
+    def test_compact(self):
+        ''' rebuilds the heap once returned loans outnumber active ones '''
+        for n, book in enumerate(self.books[:10]):
+            self.ledger.checkout(book, 1, due=TODAY + timedelta(days=n))
+        for book in self.books[:5]:
+            self.ledger.return_book(book)
+        self.assertEqual((len(self.ledger._heap), self.ledger._stale), (10, 5))
+        self.ledger.return_book(self.books[5])
+        self.assertEqual((len(self.ledger._heap), self.ledger._stale), (4, 0))
+        self.assertEqual([loan.isbn for loan in self.ledger.next_due(10)],
+                         [book.isbn for book in self.books[6:10]])
+
+    def test_checkout(self):
+        ''' marks books unavailable and indexes loans by member '''
+        loan = self.ledger.checkout(self.books[0], 1, today=TODAY)
+        self.assertEqual(loan.due, TODAY + timedelta(days=14))
+        self.assertFalse(self.books[0].is_available)
+        self.assertIn(self.books[0].isbn, self.ledger)
+        with self.assertRaises(BookUnavailable):
+            self.ledger.checkout(self.books[0], 2)
+        self.assertEqual(self.ledger.loans_for(1), [loan])
+        self.assertIs(self.ledger.return_book(self.books[0]), loan)
+        self.assertTrue(self.books[0].is_available)
+        self.assertEqual((self.ledger.loans_for(1), self.ledger.loan_count(1)), ([], 0))
+        with self.assertRaises(UnknownLoan):
+            self.ledger.return_book(self.books[0])
+
+    def test_max_loans(self):
+        ''' raises BorrowLimitReached at max_loans until a book is returned '''
+        ledger = LoanLedger(max_loans=2)
+        ledger.checkout(self.books[0], 1)
+        ledger.checkout(self.books[1], 1)
+        with self.assertRaises(BorrowLimitReached):
+            ledger.checkout(self.books[2], 1)
+        self.assertTrue(self.books[2].is_available)
+        ledger.checkout(self.books[2], 2)
+        ledger.return_book(self.books[0])
+        ledger.checkout(self.books[3], 1)
+        self.assertEqual(ledger.loan_count(1), 2)
@@ -0,0 +1,57 @@
+import unittest
+
+from library import Book, Library
+from search import SearchIndex
+
+
+class SearchIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.hobbit = Book('The Hobbit', 'J. R. R. Tolkien', '9780261103344')
+        self.silmarillion = Book('The Silmarillion', 'J. R. R. Tolkien', '9780261102736')
+        self.holes = Book('Holes', 'Louis Sachar', '9780439244190')
+        for book in (self.hobbit, self.silmarillion, self.holes):
+            self.index.add(book)
+
+    def test_search(self):
+        ''' ranks books containing the rarer query tokens first '''
+        self.assertEqual([isbn for isbn, _ in self.index.search('tolkien hobbit')],
+                         ['9780261103344', '9780261102736'])
+        self.assertEqual(self.index.search('dragon'), [])
+        self.assertEqual(self.index.search(''), [])
+
+    def test_complete(self):
+        ''' completes prefixes from the sorted vocabulary, limited and case insensitive '''
+        self.assertEqual(self.index.complete('HO'), ['hobbit', 'holes'])
+        self.assertEqual(self.index.complete('ho', limit=1), ['hobbit'])
+        self.assertEqual(self.index.complete('z'), [])
+
+    def test_add_and_remove(self):
+        ''' keeps prefix searches current as books are added and removed '''
+        self.assertEqual(self.index.complete('ho'), ['hobbit', 'holes'])
+        self.index.remove(self.holes)
+        self.assertEqual(self.index.complete('ho'), ['hobbit'])
+        self.assertEqual(self.index.complete('sachar'), [])
+        self.index.add(Book('Hogfather', 'Terry Pratchett', '9780552167673'))
+        self.assertEqual(self.index.complete('ho'), ['hobbit', 'hogfather'])
+        self.assertEqual([isbn for isbn, _ in self.index.search('hog', prefix=True)], ['9780552167673'])
+        # Tokens shared with remaining books stay in the vocabulary.
+        self.index.remove(self.hobbit)
+        self.assertEqual(self.index.complete('tolk'), ['tolkien'])
+        self.assertEqual(len(self.index), 2)
+
+    def test_add_many(self):
+        ''' indexes books in bulk the same as adding them one at a time '''
+        index = SearchIndex()
+        index.add_many([self.hobbit, self.silmarillion, self.holes])
+        self.assertEqual(index.complete('ho'), self.index.complete('ho'))
+        self.assertEqual(index.search('tolkien the'), self.index.search('tolkien the'))
+
+    def test_library(self):
+        ''' searches the library catalog as books are added and removed '''
+        library = Library('test')
+        library.add_book(self.hobbit)
+        library.add_book(self.holes)
+        self.assertEqual(library.complete('ho'), ['hobbit', 'holes'])
+        library.remove_book(self.holes.isbn)
+        self.assertEqual(library.search('ho', prefix=True), [self.hobbit])
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from library import Book, BookOnLoan, Library, Member
+from loans import BorrowLimitReached
+from locking import LockStripes
+from snapshot import Journal, Snapshot, checkpoint, restore, write_snapshot
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.snapshot_path = os.path.join(directory.name, 'library.snap')
+        self.journal_path = os.path.join(directory.name, 'library.journal')
+        self.library = Library('test', thread_safe=True)
+        self.library.add_book(Book('The Hobbit', 'J. R. R. Tolkien', '9780261103344'))
+        self.library.add_book(Book('The Silmarillion', 'J. R. R. Tolkien', '9780261102736'))
+        self.library.add_member(Member('Bilbo', 1))
+
+    def test_restore(self):
+        ''' restores books, members, loans and indexes from a snapshot '''
+        self.library.checkout('9780261103344', 1, today=date(2024, 1, 1))
+        write_snapshot(self.library, self.snapshot_path)
+        library = restore(self.snapshot_path)
+        self.assertEqual(sorted(library.books), sorted(self.library.books))
+        self.assertEqual(library.find_member(1).name, 'Bilbo')
+        self.assertFalse(library.find_book('9780261103344').is_available)
+        self.assertEqual(library.loans.loans_for(1)[0].due, date(2024, 1, 15))
+        self.assertEqual(len(library.books_by_author('j. r. r. tolkien')), 2)
+        self.assertEqual([book.isbn for book in library.books_by_title('the hobbit')], ['9780261103344'])
+        self.assertEqual([book.isbn for book in library.search('silmarillion')], ['9780261102736'])
+
+    def test_remove_loaned_book(self):
+        ''' refuses to remove books on loan, so snapshots never hold loans of missing books '''
+        self.library.checkout('9780261103344', 1)
+        with self.assertRaises(BookOnLoan):
+            self.library.remove_book('9780261103344')
+        write_snapshot(self.library, self.snapshot_path)
+        self.assertIn('9780261103344', restore(self.snapshot_path).books)
+
+    def test_checkpoint(self):
+        ''' replays changes made after the last checkpoint '''
+        self.library.journal = Journal(self.journal_path)
+        self.addCleanup(self.library.journal.close)
+        checkpoint(self.library, self.snapshot_path)
+        self.library.checkout('9780261102736', 1)
+        self.library.add_book(Book('Unfinished Tales', 'J. R. R. Tolkien', '9780261102163'))
+
+        library = restore(self.snapshot_path, self.journal_path)
+        self.addCleanup(library.journal.close)
+        self.assertIn('9780261102163', library.books)
+        self.assertFalse(library.find_book('9780261102736').is_available)
+        self.assertEqual(len(library.books_by_author('J. R. R. Tolkien')), 3)
+
+    def test_add_book_journal_order(self):
+        ''' holds the book stripe while journaling add_book, so its checkouts are journaled after it '''
+        library = self.library
+        held = []
+
+        class Recorder:
+            def record(self, operation, **fields):
+                if operation == 'add_book':
+                    held.append(library._book_lock(fields['isbn']).locked())
+
+        library.journal = Recorder()
+        library.add_book(Book('Unfinished Tales', 'J. R. R. Tolkien', '9780261102163'))
+        self.assertEqual(held, [True])
+
+    def test_restore_settings(self):
+        ''' restores with the library settings and without rechecking the borrow limit '''
+        library = Library('test', thread_safe=True, max_loans=10)
+        library.add_member(Member('Bilbo', 1))
+        library.journal = Journal(self.journal_path)
+        self.addCleanup(library.journal.close)
+        for n in range(9):
+            library.add_book(Book(f'Title {n}', 'Author', f'978{n:010d}'))
+        for n in range(7):
+            library.checkout(f'978{n:010d}', 1)
+        checkpoint(library, self.snapshot_path)
+        library.checkout('9780000000007', 1)
+
+        restored = restore(self.snapshot_path, self.journal_path, thread_safe=True, max_loans=10)
+        self.addCleanup(restored.journal.close)
+        self.assertEqual(restored.loans.loan_count(1), 8)
+        self.assertEqual(restored.loans.max_loans, 10)
+        self.assertIsInstance(restored._book_lock, LockStripes)
+        restored.checkout('9780000000008', 1)
+
+        # A lower limit still loads the existing loans but refuses new ones.
+        with Snapshot(self.snapshot_path) as snapshot:
+            limited = snapshot.load()
+        self.assertEqual(limited.loans.loan_count(1), 7)
+        with self.assertRaises(BorrowLimitReached):
+            limited.checkout('9780000000008', 1)
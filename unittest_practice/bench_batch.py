@@ -0,0 +1,74 @@
+''' Per image time for one POST per image versus one batch POST, at batch sizes 1 to 256.
+
+    > python bench_batch.py
+    > python bench_batch.py --sizes 1 16 256 --pixels 64 --workers 0
+
+    Every upload is a different small image, so the EffectCache never hits
+    and the per request overhead dominates the effect itself.
+'''
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+from playground import wsgi
+
+
+def upload(n: int, size: int) -> bytes:
+    image = Image.effect_noise((size, size), 64).convert('RGB')
+    image.putpixel((0, 0), (n % 256, n // 256 % 256, n // 65536 % 256))
+    buffer = io.BytesIO()
+    image.save(buffer, 'png')
+    return buffer.getvalue()
+
+
+def singles(client, uploads) -> float:
+    start = time.perf_counter()
+    for data in uploads:
+        response = client.post('/image/', data={'image': (io.BytesIO(data), 'bench.png'), 'effect': 'blur'})
+        assert response.status_code == 302
+    return time.perf_counter() - start
+
+
+def batch(client, uploads) -> float:
+    start = time.perf_counter()
+    files = [(io.BytesIO(data), f'{n}.png') for n, data in enumerate(uploads)]
+    response = client.post('/image/batch', data={'images': files, 'effect': 'blur'})
+    assert response.status_code == 200
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 4, 16, 64, 256])
+    parser.add_argument('--pixels', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    os.environ['APP_UNDER_TEST'] = '1'
+    wsgi.app.config['EFFECT_WORKERS'] = args.workers
+    wsgi.app.config['MAX_CONTENT_LENGTH'] = None
+    seen = 0
+    with tempfile.TemporaryDirectory() as folder, wsgi.app.test_client() as client:
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = folder
+        with client.session_transaction() as session:
+            session['username'] = 'admin'
+        # Start the worker processes before timing.
+        batch(client, [upload(-1, args.pixels)])
+
+        print(f'{"images":>7} {"single ms/img":>14} {"batch ms/img":>13}')
+        for size in args.sizes:
+            single_uploads = [upload(seen + n, args.pixels) for n in range(size)]
+            batch_uploads = [upload(seen + size + n, args.pixels) for n in range(size)]
+            seen += 2 * size
+            single = singles(client, single_uploads) / size * 1000
+            batched = batch(client, batch_uploads) / size * 1000
+            print(f'{size:>7} {single:>14.2f} {batched:>13.2f}')
+    wsgi.get_effects_executor().shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+''' Requests per second for the image route with effects run inline or in a process pool.
+
+    > python bench_executor.py
+    > python bench_executor.py --clients 8 --requests 64 --size 512
+
+    Every request uploads a different image so the EffectCache never hits.
+'''
+import argparse
+import io
+import os
+import tempfile
+import threading
+import time
+
+from PIL import Image
+
+from playground import wsgi
+
+
+def upload(n: int, size: int) -> bytes:
+    image = Image.effect_noise((size, size), 64 + n % 64).convert('RGB')
+    image.putpixel((0, 0), (n % 256, n // 256 % 256, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, 'png')
+    return buffer.getvalue()
+
+
+def client_loop(uploads, statuses):
+    with wsgi.app.test_client() as client:
+        with client.session_transaction() as session:
+            session['username'] = 'admin'
+        for data in uploads:
+            response = client.post('/image/', data={'image': (io.BytesIO(data), 'bench.png'), 'effect': 'mode'})
+            statuses.append(response.status_code)
+
+
+def run(workers: int, clients: int, uploads: list) -> tuple:
+    wsgi.app.config['EFFECT_WORKERS'] = workers
+    wsgi.app.extensions.pop('effects_executor', None)
+    wsgi.app.extensions.pop('effect_cache', None)
+    statuses = []
+    threads = [threading.Thread(target=client_loop, args=(uploads[n::clients], statuses)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    wsgi.get_effects_executor().shutdown()
+    return len(statuses) / elapsed, statuses.count(503)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=os.cpu_count() * 2)
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--size', type=int, default=512)
+    args = parser.parse_args()
+
+    os.environ['APP_UNDER_TEST'] = '1'
+    with tempfile.TemporaryDirectory() as folder:
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = folder
+        print(f'{"mode":>8} {"req/s":>8} {"503s":>6}')
+        for name, workers in [('inline', 0), ('pool', os.cpu_count())]:
+            uploads = [upload(n + workers * args.requests, args.size) for n in range(args.requests)]
+            throughput, rejected = run(workers, args.clients, uploads)
+            print(f'{name:>8} {throughput:>8.2f} {rejected:>6}')
+
+
+if __name__ == '__main__':
+    main()
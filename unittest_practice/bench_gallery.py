@@ -0,0 +1,42 @@
+''' Gallery page weight and derivative generation time.
+
+    > python bench_gallery.py
+    > python bench_gallery.py --images 48 --width 4000 --format jpg
+
+    Page weight is the total size of the images a gallery page loads.
+'''
+import argparse
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+from playground.effects import DERIVATIVE_SIZES, derivative, save
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=24)
+    parser.add_argument('--width', type=int, default=3000)
+    parser.add_argument('--format', choices=['png', 'jpg'], default='jpg')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        names = [
+            save(Image.effect_noise((args.width, args.width * 3 // 4), 20 + n).convert('RGB'), args.format, save_dir)
+            for n in range(args.images)
+        ]
+        print(f'{"size":>8} {"page MB":>8} {"cold ms/img":>12} {"warm ms/img":>12}')
+        for size in ['full', *DERIVATIVE_SIZES]:
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                paths = [derivative(name, size, save_dir) for name in names]
+                timings.append((time.perf_counter() - start) / len(names) * 1e3)
+            weight = sum(os.path.getsize(os.path.join(save_dir, path)) for path in paths) / 2**20
+            print(f'{size:>8} {weight:>8.2f} {timings[0]:>12.2f} {timings[1]:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
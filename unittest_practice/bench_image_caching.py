@@ -0,0 +1,55 @@
+''' Bytes and time to load every thumbnail on a gallery page, cold and revalidated.
+
+    > python bench_image_caching.py
+    > python bench_image_caching.py --images 48 --size 1024
+
+    The revalidated load sends the ETags from the cold load, as a browser
+    does when its cached copy expires.
+'''
+import argparse
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+from playground import wsgi
+
+
+def load(client, urls, etags) -> tuple:
+    start = time.perf_counter()
+    sent = 0
+    for url in urls:
+        headers = {'If-None-Match': etags[url]} if url in etags else {}
+        response = client.get(url, headers=headers)
+        etags[url] = response.headers['ETag']
+        sent += len(response.get_data())
+    return sent, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=48)
+    parser.add_argument('--size', type=int, default=1024)
+    args = parser.parse_args()
+
+    os.environ['APP_UNDER_TEST'] = '1'
+    with tempfile.TemporaryDirectory() as folder, wsgi.app.test_client() as client:
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = folder
+        names = [wsgi.save(Image.effect_noise((args.size, args.size), 32 + n).convert('RGB'), 'png', folder)
+                 for n in range(args.images)]
+        with client.session_transaction() as session:
+            session['username'] = 'admin'
+        urls = [f'/derivatives/thumb/{name}' for name in names]
+        # Generate the thumbnails first so only serving is timed.
+        load(client, urls, {})
+
+        etags = {}
+        print(f'{"load":>12} {"bytes":>10} {"ms":>8}')
+        for label in ('cold', 'revalidated'):
+            sent, elapsed = load(client, urls, etags)
+            print(f'{label:>12} {sent:>10} {elapsed * 1000:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
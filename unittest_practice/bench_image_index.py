@@ -0,0 +1,56 @@
+''' Gallery listing cost: three glob() calls versus the ImageIndex.
+
+    > python bench_image_index.py
+    > python bench_image_index.py --files 1000 10000
+
+    Files are empty placeholders; only the directory listing is measured.
+'''
+import argparse
+import os
+import tempfile
+import time
+from glob import glob
+
+from playground.image_index import ImageIndex
+
+FILES = [1_000, 10_000, 100_000]
+REPEAT = 20
+
+
+def per_call_ms(function) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function()
+    return (time.perf_counter() - start) / REPEAT * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, nargs='+', default=FILES)
+    parser.add_argument('--per-page', type=int, default=48)
+    args = parser.parse_args()
+
+    print(f'{"files":>8} {"glob ms":>10} {"scan ms":>10} {"page ms":>10}')
+    for count in args.files:
+        with tempfile.TemporaryDirectory() as folder:
+            for n in range(count):
+                open(os.path.join(folder, f'{n:056x}.{("png", "jpg", "jpeg")[n % 3]}'), 'w').close()
+
+            globbed = per_call_ms(lambda: [
+                os.path.basename(path) for pattern in ('*.png', '*.jpg', '*.jpeg')
+                for path in glob(os.path.join(folder, pattern))
+            ])
+            index = ImageIndex(folder)
+            start = time.perf_counter()
+            index.refresh()
+            scan = (time.perf_counter() - start) * 1e3
+
+            def page():
+                index.refresh()
+                return index.page(count // args.per_page // 2, args.per_page)
+
+            print(f'{count:>8} {globbed:>10.2f} {scan:>10.1f} {per_call_ms(page):>10.4f}')
+
+
+if __name__ == '__main__':
+    main()
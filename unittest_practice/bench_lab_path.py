@@ -0,0 +1,70 @@
+''' Per response overhead of the fix_lab_path after_request hook.
+
+    > python bench_lab_path.py
+    > python bench_lab_path.py --images 48 500 --repeat 2000
+
+    Compares the previous implementation (decode, then a str regex over the
+    whole body every time) with LabPathRewriter on a rendered gallery page:
+    uncached, cached by template name and ETag, and streamed in chunks.
+'''
+import argparse
+import re
+import time
+
+from flask import Response, g, render_template
+
+from playground import wsgi
+from playground.lab_path import LabPathRewriter
+
+# The regex used before LabPathRewriter.
+old_app_urls = re.compile(r'''([href|action|src]){1}=['"](/.*?)['"].*?''', re.I)
+
+
+def old_fix_lab_path(response):
+    if 'html' in response.content_type:
+        response.data = old_app_urls.sub(r'\1="/app\2"', response.data.decode())
+    return response
+
+
+def per_response(hook, make_response, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = hook(make_response())
+        if response.is_streamed:
+            for _ in response.response:
+                pass
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, nargs='+', default=[0, 48, 500])
+    parser.add_argument('--repeat', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f'{"images":>7} {"bytes":>8} {"old us":>8} {"uncached us":>12} {"cached us":>10} {"streamed us":>12}')
+    for count in args.images:
+        images = [f'{n:056x}.png' for n in range(count)]
+        with wsgi.app.test_request_context():
+            body = render_template('images.html', images=images, page=1, sort='created', page_count=1)
+            chunks = [body[n:n + 4096].encode() for n in range(0, len(body), 4096)]
+            rewriter = LabPathRewriter()
+
+            def buffered():
+                return Response(body, mimetype='text/html')
+
+            def streamed():
+                return Response(iter(chunks), mimetype='text/html')
+
+            old = per_response(old_fix_lab_path, buffered, args.repeat)
+            # No template recorded: the body is rewritten every time.
+            g.pop('lab_template', None)
+            uncached = per_response(rewriter, buffered, args.repeat)
+            g.lab_template = 'images.html'
+            cached = per_response(rewriter, buffered, args.repeat)
+            stream = per_response(rewriter, streamed, args.repeat)
+        print(f'{count:>7} {len(body):>8} {old:>8.1f} {uncached:>12.1f} {cached:>10.1f} {stream:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+''' Pillow versus NumPy effect engines across image sizes and radii.
+
+    > python bench_numpy_effects.py
+    > python bench_numpy_effects.py --sizes 256 1024 --radii 2 20 --mode-sizes 3 10
+
+    posterized  | Noise reduced to 32 colors, so the mode filter has repeated values to find.
+    photo       | Smooth noise over a gradient, with the continuous tones of a photo.
+                  Each band holds about 160 distinct values.
+'''
+import argparse
+import time
+
+from PIL import Image, ImageFilter
+
+from playground import numpy_effects
+
+
+def seconds(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def posterized(size: int) -> Image:
+    return Image.effect_noise((size, size), 64).convert('RGB').quantize(32).convert('RGB')
+
+
+def photo(size: int) -> Image:
+    bands = [Image.effect_noise((size, size), sigma).filter(ImageFilter.GaussianBlur(2)) for sigma in (40, 60, 80)]
+    gradient = Image.linear_gradient('L').resize((size, size)).convert('RGB')
+    return Image.blend(Image.merge('RGB', bands), gradient, 0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 1024, 2048])
+    parser.add_argument('--radii', type=float, nargs='+', default=[2, 20, 100])
+    parser.add_argument('--mode-sizes', type=int, nargs='+', default=[3, 10])
+    args = parser.parse_args()
+
+    print(f'{"effect":>10} {"image":>10} {"pixels":>10} {"param":>6} {"pillow s":>9} {"numpy s":>9}')
+    for size in args.sizes:
+        for name, img in (('posterized', posterized(size)), ('photo', photo(size))):
+            for radius in args.radii:
+                pillow = seconds(lambda: img.filter(ImageFilter.BoxBlur(radius)))
+                numpy = seconds(lambda: numpy_effects.box_blur(img, radius))
+                print(f'{"blur":>10} {name:>10} {size * size:>10} {radius:>6g} {pillow:>9.3f} {numpy:>9.3f}')
+            for mode_size in args.mode_sizes:
+                pillow = seconds(lambda: img.filter(ImageFilter.ModeFilter(mode_size)))
+                numpy = seconds(lambda: numpy_effects.mode_filter(img, mode_size))
+                print(f'{"mode":>10} {name:>10} {size * size:>10} {mode_size:>6} {pillow:>9.3f} {numpy:>9.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+''' Per call overhead of requires_login with and without the PrincipalCache.
+
+    > python bench_requires_login.py
+    > python bench_requires_login.py --calls 200000 --users 100000
+
+    session only  | The previous check: 'username' in session.
+    cached        | verify_session with a cached session id.
+    uncached      | verify_session checking UserManagement on every call (ttl 0).
+'''
+import argparse
+import time
+from functools import wraps
+
+from flask import Flask, session
+
+from playground.principals import PrincipalCache, start_session, verify_session
+from playground.userman import UserManagement
+
+
+def session_only(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if 'username' in session:
+            return func(*args, **kwargs)
+        return None
+    return wrapper
+
+
+def verified(principals, users):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if verify_session(session, principals, users) is not None:
+                return func(*args, **kwargs)
+            return None
+        return wrapper
+    return decorator
+
+
+def route():
+    return 'ok'
+
+
+def per_call(view, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        view()
+    return (time.perf_counter() - start) / calls * 1_000_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=100_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Credentials aren't checked here, so skip hashing while adding users.
+    users = UserManagement(iterations=1, max_workers=0)
+    for n in range(args.users):
+        users.upsert_user(f'user{n}', 'pw')
+    app = Flask(__name__)
+    app.secret_key = b'bench'
+
+    views = [
+        ('bare', route),
+        ('session only', session_only(route)),
+        ('cached', verified(PrincipalCache(ttl=300), users)(route)),
+        ('uncached', verified(PrincipalCache(ttl=0), users)(route)),
+    ]
+    print(f'{"decorator":>14} {"ns/call":>9}')
+    with app.test_request_context():
+        start_session(session, f'user{args.users // 2}')
+        for name, view in views:
+            view()
+            print(f'{name:>14} {per_call(view, args.calls):>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
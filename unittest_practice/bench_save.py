@@ -0,0 +1,54 @@
+''' Peak RSS added by naming an image with file_id(image.tobytes()) versus image_id(image).
+
+    > python bench_save.py
+    > python bench_save.py --megapixels 50
+
+    Each method runs in a fresh interpreter so ru_maxrss isn't shared between them.
+'''
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+from PIL import Image
+
+from playground.effects import file_id, image_id
+
+METHODS = {
+    'tobytes': lambda image: file_id(image.tobytes()),
+    'image_id': image_id,
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(method: str, megapixels: int):
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    image = Image.new('RGB', (width, width * 3 // 4), 'teal')
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    METHODS[method](image)
+    elapsed = time.perf_counter() - start
+    print(f'{method:>10} {peak_rss_mb() - before:>14.1f} {elapsed:>8.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megapixels', type=int, default=20)
+    parser.add_argument('--method', choices=METHODS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.method:
+        measure(args.method, args.megapixels)
+        return
+    print(f'{"method":>10} {"peak RSS +MB":>14} {"seconds":>8}')
+    for method in METHODS:
+        subprocess.run([sys.executable, __file__, '--megapixels', str(args.megapixels), '--method', method], check=True)
+
+
+if __name__ == '__main__':
+    main()
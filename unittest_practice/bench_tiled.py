@@ -0,0 +1,51 @@
+''' Tiled effects engine scaling from 1 to N worker processes.
+
+    > python bench_tiled.py
+    > python bench_tiled.py --megapixels 12 --workers 1 2 4 8 --radius 10 --mode-size 5
+
+    Each worker count is run twice and the second time reported, so the
+    process pool start up isn't counted.
+'''
+import argparse
+import math
+import os
+import time
+
+from PIL import Image, ImageFilter
+
+from playground import tiled
+
+
+def seconds(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megapixels', type=float, default=50)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, os.cpu_count() // 2 or 1, os.cpu_count()}))
+    parser.add_argument('--radius', type=float, default=20)
+    parser.add_argument('--mode-size', type=int, default=5)
+    args = parser.parse_args()
+
+    side = int(math.sqrt(args.megapixels * 1_000_000))
+    img = Image.effect_noise((side, side), 64).convert('RGB').quantize(32).convert('RGB')
+    filters = [('blur', ImageFilter.BoxBlur(args.radius)), ('mode', ImageFilter.ModeFilter(args.mode_size))]
+
+    print(f'{side}x{side} RGB, {os.cpu_count()} CPUs')
+    print(f'{"effect":>8} {"workers":>8} {"seconds":>9} {"speedup":>8}')
+    for name, image_filter in filters:
+        single = seconds(lambda: img.filter(image_filter))
+        print(f'{name:>8} {"-":>8} {single:>9.3f} {1:>8.2f}')
+        for workers in args.workers:
+            tiled.tiled_filter(img, image_filter, workers)
+            elapsed = seconds(lambda: tiled.tiled_filter(img, image_filter, workers))
+            print(f'{name:>8} {workers:>8} {elapsed:>9.3f} {single / elapsed:>8.2f}')
+    tiled.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+''' Login throughput for UserManagement with 100k users at a configurable KDF cost.
+
+    > python bench_userman.py
+    > python bench_userman.py --users 100000 --logins 2000 --iterations 10000 --clients 32
+
+    Users are created with every hashing thread, then --clients threads
+    log in concurrently, one in ten with a wrong password and one in ten
+    as an unknown user.
+'''
+import argparse
+import os
+import threading
+import time
+
+from playground.userman import UserManagement
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--logins', type=int, default=5_000)
+    parser.add_argument('--iterations', type=int, default=1_000)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    users = UserManagement(args.iterations, args.workers)
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=lambda n=n: [users.upsert_user(f'user{i}', f'pw{i}')
+                                             for i in range(n, args.users, args.clients)])
+        for n in range(args.clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    created = time.perf_counter() - start
+
+    results = []
+
+    def client(n):
+        for i in range(n, args.logins, args.clients):
+            user = i * 7919 % args.users
+            if i % 10 == 0:
+                results.append(users.authenticate(f'user{user}', 'wrong'))
+            elif i % 10 == 1:
+                results.append(users.authenticate(f'ghost{user}', 'pw'))
+            else:
+                results.append(users.authenticate(f'user{user}', f'pw{user}'))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    users.shutdown()
+
+    print(f'{args.users} users, {args.iterations} iterations, {args.workers} hashing threads, {args.clients} clients')
+    print(f'upserts/s {args.users / created:>10.0f}')
+    print(f'logins/s  {len(results) / elapsed:>10.0f}  ({results.count(True)} accepted)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import os
+from collections import OrderedDict
+from threading import Lock
+
+from .effects import file_id
+
+# The FILE_UPLOAD_FOLDER subdirectory used for the on-disk tier.
+CACHE_DIR = '.effects-cache'
+
+
+class EffectCache:
+    ''' Content addressed cache of filtered images.
+
+        Keys are derived from the hash of the uploaded bytes, the effect,
+        its parameter and the output file type. Values are the names of
+        images previously saved into save_dir, so a hit skips decoding
+        and filtering entirely.
+
+        Tiers:
+            memory | An LRU of at most max_entries keys.
+            disk   | One small file per key inside save_dir/.effects-cache
+                     holding the image name. Shared between processes and
+                     kept across restarts.
+
+        Entries whose image has since been deleted are treated as misses.
+    '''
+
+    def __init__(self, save_dir, max_entries=1024):
+        self.save_dir = save_dir
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(content_id: str, effect: str, parameter, file_type: str, max_size=None) -> str:
+        # Keys without a max_size match those stored before it was added.
+        suffix = f':{max_size}' if max_size else ''
+        return file_id(f'{content_id}:{effect}:{parameter}:{file_type}{suffix}'.encode())
+
+    def _disk_path(self, key):
+        return os.path.join(self.save_dir, CACHE_DIR, key)
+
+    def _exists(self, name):
+        return os.path.exists(os.path.join(self.save_dir, name))
+
+    def get(self, key: str):
+        ''' Return the cached image name or None. '''
+        with self._lock:
+            name = self._entries.get(key)
+            if name is not None:
+                self._entries.move_to_end(key)
+        if name is not None and self._exists(name):
+            self._count('hits')
+            return name
+
+        try:
+            with open(self._disk_path(key)) as marker:
+                name = marker.read()
+        except FileNotFoundError:
+            name = None
+        if name and self._exists(name):
+            self._count('disk_hits')
+            self._remember(key, name)
+            return name
+
+        self._count('misses')
+        return None
+
+    def put(self, key: str, name: str):
+        os.makedirs(os.path.join(self.save_dir, CACHE_DIR), exist_ok=True)
+        with open(self._disk_path(key), 'w') as marker:
+            marker.write(name)
+        self._remember(key, name)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _remember(self, key, name):
+        with self._lock:
+            self._entries[key] = name
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+        }
@@ -1,38 +1,229 @@
+import io
 import os
 import hashlib
+import zipfile
+from threading import Lock
 
-from PIL import Image, ImageFilter
+from PIL import Image, ImageFilter, UnidentifiedImageError
+from PIL.Image import DecompressionBombError
+
+from . import numpy_effects, tiled
 
 
 class InvalidImageError(Exception): ...
 
 
+# 'pillow' filters with ImageFilter, 'numpy' with the numpy_effects module
+# and 'tiled' with ImageFilter across worker processes (see the tiled module).
+ENGINES = ('pillow', 'numpy', 'tiled')
+# The largest accepted upload, in pixels.
+MAX_PIXELS = 50_000_000
+# Leading bytes -> format, for the accepted upload formats.
+SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'PNG',
+    b'\xff\xd8\xff': 'JPEG',
+    b'GIF87a': 'GIF',
+    b'GIF89a': 'GIF',
+    b'BM': 'BMP',
+}
+
+
+# Derivative size -> the maximum width and height in pixels.
+# The 'full' size is the saved image itself.
+DERIVATIVE_SIZES = {'thumb': 256, 'medium': 1024}
+# The save_dir subdirectory where derivatives are stored.
+DERIVATIVE_DIR = 'derivatives'
+# Path -> Lock held while a derivative is being generated.
+_derivative_locks = {}
+
+
 def file_id(file_as_bytes: bytes):
     ''' Calculate the hash for the provided bytes. Used to name image files. '''
     return hashlib.sha224(file_as_bytes).hexdigest()
 
 
+def image_id(image: Image) -> str:
+    ''' Calculate file_id(image.tobytes()) without a full size copy of the pixels.
+        The raw bytes are produced and hashed a strip of rows at a time.
+    '''
+    digest = hashlib.sha224()
+    width, height = image.size
+    # Roughly 1 MB of pixel data per strip.
+    rows = max(1, 2**20 // max(1, width * len(image.getbands())))
+    for top in range(0, height, rows):
+        digest.update(image.crop((0, top, width, min(top + rows, height))).tobytes())
+    return digest.hexdigest()
+
+
 def save(image: Image, file_type: str, save_dir: str):
-    name = file_id(image.tobytes())
+    name = image_id(image)
     image.save(f"{os.path.join(save_dir, name)}.{file_type}")
     return f'{name}.{file_type}'
 
 
-def blur(fp, radius=None):
-    radius = radius or 20
+def sniff(fp):
+    ''' Return the format named by the first bytes of a path or file object, or None.
+        File objects are returned to their original position.
+    '''
+    if hasattr(fp, 'read'):
+        position = fp.tell()
+        header = fp.read(16)
+        fp.seek(position)
+    else:
+        with open(fp, 'rb') as file:
+            header = file.read(16)
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    for signature, image_format in SIGNATURES.items():
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+def open_image(fp, max_size=None) -> Image:
+    ''' Open an upload without decoding its pixels.
+
+        Anything without a known image signature, or larger than MAX_PIXELS,
+        raises InvalidImageError after reading only the file header.
+
+        Args:
+            fp          | A path or file object.
+            max_size    | Optionally decode JPEG images at a reduced scale of
+                          1/2, 1/4 or 1/8, the smallest still covering
+                          max_size x max_size. Other formats are unchanged.
+    '''
+    if sniff(fp) is None:
+        raise InvalidImageError("invalid image file.")
     try:
         img = Image.open(fp)
-    except:
+    except (UnidentifiedImageError, DecompressionBombError, OSError):
         raise InvalidImageError("invalid image file.")
 
+    width, height = img.size
+    if width * height > MAX_PIXELS:
+        raise InvalidImageError(f"image exceeds {MAX_PIXELS} pixels.")
+    if max_size and img.format == 'JPEG':
+        img.draft(img.mode, (max_size, max_size))
+    return img
+
+
+def _check_engine(engine):
+    if engine not in ENGINES:
+        raise ValueError(f'unexpected effects engine: {engine}')
+
+
+def blur(fp, radius=None, max_size=None, engine='pillow'):
+    _check_engine(engine)
+    radius = radius or 20
+    img = open_image(fp, max_size)
+    if engine == 'numpy':
+        return numpy_effects.box_blur(img, radius)
+    if engine == 'tiled':
+        return tiled.tiled_filter(img, ImageFilter.BoxBlur(radius))
     return img.filter(ImageFilter.BoxBlur(radius))
 
 
-def mode(fp, size=None):
+def mode(fp, size=None, max_size=None, engine='pillow'):
+    _check_engine(engine)
     size = size or 10
+    img = open_image(fp, max_size)
+    if engine == 'numpy':
+        return numpy_effects.mode_filter(img, int(size))
+    if engine == 'tiled':
+        return tiled.tiled_filter(img, ImageFilter.ModeFilter(size))
+    return img.filter(ImageFilter.ModeFilter(size))
+
+
+def unzip_images(data: bytes, max_files: int, max_bytes: int) -> list:
+    ''' Return (file name, bytes) pairs for the files in a zip archive.
+
+        The sizes recorded in the archive are checked before anything is
+        extracted, so an archive that expands past the limits raises
+        InvalidImageError without being decompressed.
+
+        Args:
+            data        | The zip archive.
+            max_files   | The largest accepted number of files.
+            max_bytes   | The largest accepted total of uncompressed bytes.
+    '''
     try:
-        img = Image.open(fp)
-    except:
-        raise InvalidImageError("invalid image file.")
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if len(members) > max_files:
+                raise InvalidImageError(f"archive holds more than {max_files} files.")
+            if sum(info.file_size for info in members) > max_bytes:
+                raise InvalidImageError(f"archive expands to more than {max_bytes} bytes.")
+            return [(os.path.basename(info.filename), archive.read(info)) for info in members]
+    except (zipfile.BadZipFile, zipfile.LargeZipFile):
+        raise InvalidImageError("invalid zip archive.")
 
-    return img.filter(ImageFilter.ModeFilter(size))
+
+def _apply_and_save(effect, data: bytes, parameter, file_type: str, save_dir: str, engine: str,
+                    max_size=None) -> str:
+    # Decode, filter and encode one upload. Module level so it can be sent to worker processes.
+    return save(effect(io.BytesIO(data), parameter, max_size=max_size, engine=engine), file_type, save_dir)
+
+
+def apply_batch(uploads, effect, parameter, save_dir: str, engine='pillow', executor=None, max_size=None) -> list:
+    ''' Apply one effect to many uploads, save the results and return their names in order.
+
+        Every upload is checked with open_image before any work starts, so
+        one invalid image rejects the whole batch. Each image is then
+        decoded, filtered and saved by one job; with an executor the jobs
+        are pipelined across its worker processes.
+
+        Args:
+            uploads     | (file type, bytes) pairs.
+            effect      | blur or mode.
+            parameter   | The effect parameter, shared by every image.
+            save_dir    | The directory passed to save.
+            engine      | An ENGINES name.
+            executor    | An EffectsExecutor. Defaults to running each job inline.
+            max_size    | Passed to the effect, see open_image.
+    '''
+    _check_engine(engine)
+    uploads = list(uploads)
+    for _, data in uploads:
+        open_image(io.BytesIO(data))
+    jobs = [(effect, data, parameter, file_type, save_dir, engine, max_size) for file_type, data in uploads]
+    if executor is None:
+        return [_apply_and_save(*job) for job in jobs]
+    return executor.map(_apply_and_save, jobs)
+
+
+def derivative(name: str, size: str, save_dir: str) -> str:
+    ''' Return the path, relative to save_dir, of a resized copy of a saved image.
+
+        Derivatives are generated on first request and stored as
+        derivatives/<file id>.<size>.<file type>. Saved images are named by
+        their content hash, so identical images share their derivatives.
+
+        Args:
+            name        | The name returned by save.
+            size        | A DERIVATIVE_SIZES key or 'full'.
+            save_dir    | The directory passed to save.
+    '''
+    if size == 'full':
+        return name
+    limit = DERIVATIVE_SIZES[size]
+    stem, file_type = name.rsplit('.', 1)
+    relative = os.path.join(DERIVATIVE_DIR, f'{stem}.{size}.{file_type}')
+    path = os.path.join(save_dir, relative)
+    if os.path.exists(path):
+        return relative
+
+    # Requests for the same missing derivative wait for a single generation.
+    lock = _derivative_locks.setdefault(path, Lock())
+    with lock:
+        if not os.path.exists(path):
+            with Image.open(os.path.join(save_dir, name)) as img:
+                # Lets JPEG decode at a reduced scale. No-op for other formats.
+                img.draft(img.mode, (limit, limit))
+                img.thumbnail((limit, limit))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write then rename so readers never see a partial file.
+                temp_path = f'{path}.{os.getpid()}.tmp'
+                img.save(temp_path, format=Image.registered_extensions().get(f'.{file_type.lower()}'))
+                os.replace(temp_path, path)
+    _derivative_locks.pop(path, None)
+    return relative
@@ -0,0 +1,121 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from threading import BoundedSemaphore, Lock
+
+
+class Overloaded(Exception):
+    ''' Exception raised when the effects queue is full. '''
+
+class EffectTimeout(Exception):
+    ''' Exception raised when an effect takes longer than the executor timeout. '''
+
+
+def apply_effect(effect, data: bytes, parameter, engine='pillow', max_size=None):
+    ''' Run an effect such as blur or mode over the raw bytes of an upload.
+        Module level so it can be sent to worker processes.
+    '''
+    return effect(io.BytesIO(data), parameter, max_size=max_size, engine=engine)
+
+
+class EffectsExecutor:
+    ''' Runs CPU bound effects in a pool of worker processes.
+
+        At most max_pending jobs are accepted at once, counting both the
+        jobs running and those waiting for a worker. Further submissions
+        raise Overloaded rather than queuing without limit. A slot is only
+        released once its job finishes, so jobs which time out still count
+        against the limit while they run.
+
+        Args:
+            max_workers | The number of worker processes. 0 runs jobs inline
+                          on the calling thread.
+            max_pending | The number of jobs accepted at once.
+                          Defaults to twice the number of workers.
+            timeout     | Seconds to wait for a job before raising EffectTimeout.
+    '''
+
+    def __init__(self, max_workers=None, max_pending=None, timeout=30):
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self.max_pending = max_pending or 2 * max(self.max_workers, 1)
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(self.max_pending)
+        self._pending = 0
+        self._pool = None
+        self._pool_lock = Lock()
+
+    @property
+    def pending(self) -> int:
+        ''' The number of jobs running or waiting for a worker. '''
+        return self._pending
+
+    def _release(self, _=None):
+        with self._pool_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def submit(self, function, *args):
+        ''' Schedule function(*args) and return a Future. Raises Overloaded when full. '''
+        if not self._slots.acquire(blocking=False):
+            raise Overloaded(f'{self.max_pending} effects are already pending.')
+        try:
+            with self._pool_lock:
+                # Created on first use so importing the app doesn't start processes.
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(self.max_workers)
+                self._pending += 1
+                future = self._pool.submit(function, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise EffectTimeout(f'effect did not finish within {self.timeout} seconds.')
+
+    def run(self, function, *args):
+        ''' Call function(*args) in a worker and wait up to timeout for the result. '''
+        if not self.max_workers:
+            return function(*args)
+        return self._result(self.submit(function, *args))
+
+    def map(self, function, jobs) -> list:
+        ''' Call function(*args) for each args in jobs and return the results in order.
+
+            Jobs are pipelined: at most half of max_pending run or wait at
+            once, leaving the other slots for other callers, and the next
+            job is submitted as soon as the oldest finishes. The timeout
+            applies to each job. If a job fails, the jobs not yet started
+            are cancelled and the error is raised.
+        '''
+        if not self.max_workers:
+            return [function(*args) for args in jobs]
+        window = max(self.max_pending // 2, 1)
+        results = []
+        pending = deque()
+        try:
+            for args in jobs:
+                if len(pending) >= window:
+                    results.append(self._result(pending.popleft()))
+                pending.append(self.submit(function, *args))
+            while pending:
+                results.append(self._result(pending.popleft()))
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+        return results
+
+    def shutdown(self, wait=True):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        # Outside the lock, which the done callbacks of running jobs take.
+        if pool is not None:
+            pool.shutdown(wait)
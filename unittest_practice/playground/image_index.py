@@ -0,0 +1,126 @@
+import os
+from bisect import insort
+from threading import Lock
+
+# Image file types listed by the index.
+IMAGE_TYPES = ('png', 'jpg', 'jpeg')
+# Sort name -> function returning the sort key of an ImageEntry.
+SORT_KEYS = {
+    'created': lambda entry: (entry.created, entry.name),
+    'name': lambda entry: (entry.name,),
+    'size': lambda entry: (entry.size, entry.name),
+}
+
+
+class ImageEntry:
+    __slots__ = ('name', 'file_type', 'size', 'created')
+
+    def __init__(self, name, file_type, size, created):
+        self.name = name
+        self.file_type = file_type
+        self.size = size
+        self.created = created
+
+    def __repr__(self):
+        return f'<ImageEntry {self.name}>'
+
+
+class ImageIndex:
+    ''' An in-memory listing of the images saved in a folder.
+
+        Entries are kept in one sorted list per SORT_KEYS entry, so a page
+        of results is a slice rather than a directory scan.
+
+        Images saved by the app are added with add, so they are listed
+        straight away. Changes made by anything else are picked up by
+        refresh, which compares the directory mtime to the one seen at the
+        last scan and rescans only if it changed. Rescans stat only the
+        names which aren't indexed yet.
+    '''
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._entries = {}
+        self._sorted = {sort: [] for sort in SORT_KEYS}
+        self._mtime = None
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def _stat_entry(self, name):
+        stat = os.stat(os.path.join(self.folder, name))
+        return ImageEntry(name, name.rsplit('.', 1)[1].lower(), stat.st_size, stat.st_mtime)
+
+    def _insert(self, entry):
+        self._entries[entry.name] = entry
+        for sort, key in SORT_KEYS.items():
+            insort(self._sorted[sort], (key(entry), entry))
+
+    def _folder_mtime(self):
+        try:
+            return os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def add(self, name: str):
+        ''' Index an image saved into the folder.
+            Already indexed names, and names refresh wouldn't list, are ignored.
+        '''
+        if name.rsplit('.', 1)[-1].lower() not in IMAGE_TYPES:
+            return
+        with self._lock:
+            if name in self._entries:
+                return
+            self._insert(self._stat_entry(name))
+            # The directory mtime is left as it was at the last scan. It can't
+            # tell this save apart from files saved meanwhile by other workers
+            # or processes, so the next refresh rescans to find those.
+
+    def refresh(self):
+        ''' Rescan the folder if it changed since the last scan. Costs one stat otherwise. '''
+        mtime = self._folder_mtime()
+        if mtime is not None and mtime == self._mtime:
+            return
+        with self._lock:
+            try:
+                with os.scandir(self.folder) as files:
+                    names = {
+                        file.name for file in files
+                        if file.is_file() and file.name.rsplit('.', 1)[-1].lower() in IMAGE_TYPES
+                    }
+            except FileNotFoundError:
+                names = set()
+            if names != self._entries.keys():
+                # Keep the entries still present and stat only the new files.
+                entries = [self._entries.get(name) or self._stat_entry(name) for name in names]
+                self._entries = {entry.name: entry for entry in entries}
+                self._sorted = {
+                    sort: sorted((key(entry), entry) for entry in entries)
+                    for sort, key in SORT_KEYS.items()
+                }
+            self._mtime = mtime
+
+    def page(self, number=1, per_page=50, sort='created', reverse=True) -> list:
+        ''' Return the ImageEntry objects for a 1-based page number.
+
+            Args:
+                number      | The page number.
+                per_page    | The number of entries per page.
+                sort        | A SORT_KEYS key.
+                reverse     | Sort in descending order. Newest first by default.
+        '''
+        ordered = self._sorted[sort]
+        start = (number - 1) * per_page
+        if reverse:
+            stop = len(ordered) - start
+            items = ordered[max(stop - per_page, 0):max(stop, 0)][::-1]
+        else:
+            items = ordered[start:start + per_page]
+        return [entry for _, entry in items]
+
+    def page_count(self, per_page=50) -> int:
+        return max(1, -(-len(self._entries) // per_page))
@@ -0,0 +1,123 @@
+''' This application is served via a reverse proxy to allow it to become
+    accessible from the browser on /app/
+
+    This is required solely for the lab environment to ensure the /app/ URL path
+    is prepended to the URL.
+
+    Remove this code if this application is run outside of the lab environment.
+'''
+import os
+import re
+from collections import OrderedDict
+from threading import Lock
+
+from flask import g, template_rendered
+
+# The URL path the reverse proxy serves the application from.
+APP_PREFIX = '/app'
+# Capture group 1 contains the link type: href, action, src.
+# Capture group 2 contains the quote character.
+# Capture group 3 contains the local URL path. Protocol relative URLs (//host) are skipped.
+# E.g: href="/login"
+#   1: href
+#   2: "
+#   3: /login
+# Bytes rather than str so bodies are never decoded.
+app_urls = re.compile(rb'''\b(href|action|src)=(['"])(/(?!/)[^'"]*)\2''', re.I)
+
+
+class LabPathRewriter:
+    ''' Prepends a prefix to the local URLs in HTML responses.
+
+        Buffered responses are cached by the name of the template which
+        rendered them and their ETag, so a page rendered with the same
+        output again is rewritten once. Responses which set no ETag are
+        given one. Streamed responses are rewritten chunk by chunk as they
+        are sent, without buffering the body.
+
+        Args:
+            prefix      | The URL path to prepend.
+            max_entries | The number of rewritten bodies kept in the LRU cache.
+    '''
+
+    def __init__(self, prefix=APP_PREFIX, max_entries=256):
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self._replacement = rb'\1=\2' + prefix.encode() + rb'\3\2'
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def rewrite(self, body: bytes) -> bytes:
+        return app_urls.sub(self._replacement, body)
+
+    def rewrite_chunks(self, chunks):
+        ''' Rewrite an iterable of body chunks, yielding the rewritten chunks. '''
+        pending = b''
+        for chunk in chunks:
+            pending += chunk.encode() if isinstance(chunk, str) else chunk
+            # Hold back an unfinished tag; its attributes may continue in the next chunk.
+            cut = pending.rfind(b'<')
+            if cut == -1 or pending.find(b'>', cut) != -1:
+                cut = len(pending)
+            if cut:
+                yield self.rewrite(pending[:cut])
+                pending = pending[cut:]
+        if pending:
+            yield self.rewrite(pending)
+
+    def _cached(self, template: str, response) -> bytes:
+        etag, _ = response.get_etag()
+        if etag is None:
+            response.add_etag()
+            etag, _ = response.get_etag()
+        key = (template, etag)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+        body = self.rewrite(response.get_data())
+        with self._lock:
+            self._entries[key] = body
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def __call__(self, response):
+        # Adjust the URL for redirects.
+        if response.location:
+            response.location = '/'.join([self.prefix, response.location.lstrip('/')])
+        # Adjust URLs found in HTML.
+        if 'html' not in response.content_type or response.status_code == 304:
+            return response
+        if response.is_streamed:
+            response.response = self.rewrite_chunks(response.response)
+            # The length changes as URLs are rewritten.
+            response.headers.pop('Content-Length', None)
+            response.direct_passthrough = False
+            return response
+        template = g.get('lab_template')
+        if template is None:
+            response.set_data(self.rewrite(response.get_data()))
+        else:
+            response.set_data(self._cached(template, response))
+        return response
+
+
+def _remember_template(sender, template, context, **extra):
+    g.lab_template = template.name
+
+
+template_rendered.connect(_remember_template)
+
+lab_path_rewriter = LabPathRewriter()
+
+
+def fix_lab_path(response):
+    if os.environ.get('APP_UNDER_TEST', False):
+        return response
+    return lab_path_rewriter(response)
@@ -0,0 +1,154 @@
+import heapq
+import secrets
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from .userman import UnknownUser
+
+
+class PrincipalCache:
+    ''' Users verified against UserManagement, by session id.
+
+        A session is checked against UserManagement once, then trusted for
+        ttl seconds, so the per request cost of requires_login is a dict
+        lookup however many users there are.
+
+        Revocation:
+            revoke      | Reject one session id until its session expires,
+                          e.g. on logout, so a copied cookie can't be replayed.
+            revoke_user | Forget every session of a user and reject sessions
+                          issued before now, e.g. after a password change.
+
+        Args:
+            ttl              | Seconds a verified session is trusted before it is
+                               checked against UserManagement again.
+            max_entries      | The number of sessions kept. The least recently
+                               used are dropped first.
+            session_lifetime | Seconds a session cookie is accepted after it is
+                               issued. Revoked session ids are kept this long.
+                               Defaults to Flask's PERMANENT_SESSION_LIFETIME.
+    '''
+
+    def __init__(self, ttl=300, max_entries=100_000, session_lifetime=31 * 24 * 3600):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.session_lifetime = session_lifetime
+        # session id -> (username, monotonic expiry time)
+        self._entries = OrderedDict()
+        # username -> the wall clock time of the last revoke_user
+        self._revoked = {}
+        # Revoked session ids, and a heap of (wall clock expiry time, session id) to drop them.
+        self._revoked_sessions = set()
+        self._revoked_expiry = []
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str):
+        ''' Return the username verified for a session id, or None. '''
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(session_id)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[session_id]
+            self.misses += 1
+        return None
+
+    def put(self, session_id: str, username: str):
+        with self._lock:
+            self._entries[session_id] = (username, time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def revoke(self, session_id: str, issued=None):
+        ''' Args:
+                session_id  | The session id to reject.
+                issued      | The wall clock time the session was issued. Defaults to now.
+        '''
+        expiry = (time.time() if issued is None else issued) + self.session_lifetime
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self._expire_revoked()
+            if session_id not in self._revoked_sessions:
+                self._revoked_sessions.add(session_id)
+                heapq.heappush(self._revoked_expiry, (expiry, session_id))
+
+    def _expire_revoked(self):
+        # Expired sessions are rejected anyway, so their ids can be forgotten.
+        now = time.time()
+        while self._revoked_expiry and self._revoked_expiry[0][0] <= now:
+            self._revoked_sessions.discard(heapq.heappop(self._revoked_expiry)[1])
+
+    def is_session_revoked(self, session_id: str) -> bool:
+        return session_id in self._revoked_sessions
+
+    def revoke_user(self, username: str):
+        username = username.lower()
+        with self._lock:
+            self._revoked[username] = time.time()
+            for session_id in [sid for sid, (name, _) in self._entries.items() if name.lower() == username]:
+                del self._entries[session_id]
+
+    def is_revoked(self, username: str, issued: float) -> bool:
+        ''' True if the user was revoked after a session was issued at the issued time. '''
+        return self._revoked.get(username.lower(), -1) >= issued
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'revoked_sessions': len(self._revoked_sessions),
+                'hits': self.hits, 'misses': self.misses}
+
+
+def start_session(session, username: str):
+    ''' Log a user into a Flask session, giving it a new session id. '''
+    session['username'] = username
+    session['sid'] = secrets.token_urlsafe(16)
+    session['issued'] = time.time()
+
+
+def end_session(session, principals: PrincipalCache):
+    ''' Log out of a Flask session and revoke its session id. '''
+    sid = session.pop('sid', None)
+    issued = session.pop('issued', None)
+    if sid is not None:
+        principals.revoke(sid, issued)
+    session.pop('username', None)
+
+
+def verify_session(session, principals: PrincipalCache, user_management):
+    ''' Return the username logged into a Flask session, or None.
+
+        Cached session ids are trusted. Anything else is checked against
+        user_management and cached. Revoked sessions, and sessions of
+        unknown or revoked users, are cleared.
+    '''
+    sid = session.get('sid')
+    if sid is not None:
+        if principals.is_session_revoked(sid):
+            session.clear()
+            return None
+        username = principals.get(sid)
+        if username is not None:
+            return username
+
+    username = session.get('username')
+    if username is None:
+        return None
+    try:
+        user_management.creds_for(username)
+    except UnknownUser:
+        session.clear()
+        return None
+    # Sessions from before session ids count as issued at time 0.
+    if principals.is_revoked(username, session.get('issued', 0)):
+        session.clear()
+        return None
+    if sid is None:
+        sid = session['sid'] = secrets.token_urlsafe(16)
+        session['issued'] = time.time()
+    principals.put(sid, username)
+    return username
@@ -1,16 +1,120 @@
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from threading import BoundedSemaphore, Lock
+
+# PBKDF2-HMAC-SHA256 iterations for new passwords.
+ITERATIONS = 600_000
+SALT_BYTES = 16
+
+
 class UnknownUser(Exception):
     ''' Exception raised if a username is not found. '''
 
+class HashingOverloaded(Exception):
+    ''' Exception raised when the password hashing queue is full. '''
+
+class HashingTimeout(Exception):
+    ''' Exception raised when a password hash takes longer than the timeout. '''
+
+
+class HashedPassword:
+    ''' A salted PBKDF2-HMAC-SHA256 hash of a password. '''
+    __slots__ = ('salt', 'iterations', 'digest')
+
+    def __init__(self, salt: bytes, iterations: int, digest: bytes):
+        self.salt = salt
+        self.iterations = iterations
+        self.digest = digest
+
+    def __repr__(self):
+        return f'<HashedPassword pbkdf2_sha256 {self.iterations}>'
+
+    @classmethod
+    def new(cls, password: str, iterations=ITERATIONS):
+        salt = os.urandom(SALT_BYTES)
+        return cls(salt, iterations, _kdf(password, salt, iterations))
+
+    def verify(self, password: str) -> bool:
+        ''' Compare in constant time, so the time taken reveals nothing about the hash. '''
+        return hmac.compare_digest(_kdf(password, self.salt, self.iterations), self.digest)
+
+
+def _kdf(password: str, salt: bytes, iterations: int) -> bytes:
+    # hashlib releases the GIL while deriving, so pool threads run it in parallel.
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+
 class UserManagement:
-    ''' Fake user management system.  '''
+    ''' Fake user management system.
+
+        Passwords are stored as HashedPassword objects, never as plaintext.
+        Hashing is deliberately slow, so it runs on a pool of at most
+        max_workers threads. At most max_pending hashes run or wait for the
+        pool at once. Beyond that HashingOverloaded is raised, so a burst of
+        logins is turned away instead of occupying every request thread.
 
-    def __init__(self):
+        Args:
+            iterations  | PBKDF2 iterations for new passwords.
+            max_workers | The number of hashing threads. Defaults to the CPU
+                          count. 0 hashes on the calling thread.
+            max_pending | The number of hashes accepted at once.
+                          Defaults to four times the number of workers.
+            timeout     | Seconds to wait for a hash before raising HashingTimeout.
+    '''
+
+    def __init__(self, iterations=ITERATIONS, max_workers=None, max_pending=None, timeout=10):
         self.creds = {}
+        self.iterations = iterations
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self.max_pending = max_pending or 4 * max(self.max_workers, 1)
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(self.max_pending)
+        self._pending = 0
+        self._pool = None
+        self._pool_lock = Lock()
+        # Verified against when the user is unknown, so unknown users
+        # take as long to reject as wrong passwords.
+        self._unknown = HashedPassword(os.urandom(SALT_BYTES), iterations, os.urandom(32))
+
+    @property
+    def pending(self) -> int:
+        ''' The number of hashes running or waiting for a thread. '''
+        return self._pending
+
+    def _release(self, _=None):
+        with self._pool_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _hash(self, function, *args):
+        if not self.max_workers:
+            return function(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded(f'{self.max_pending} password hashes are already pending.')
+        try:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix='kdf')
+                self._pending += 1
+                future = self._pool.submit(function, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the hash finishes, even after a timeout.
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise HashingTimeout(f'password hash did not finish within {self.timeout} seconds.')
 
     def upsert_user(self, username, password):
-        self.creds[username.lower()] = password
+        self.creds[username.lower()] = self._hash(HashedPassword.new, password, self.iterations)
 
-    def creds_for(self, username):
+    def creds_for(self, username) -> HashedPassword:
         try:
             return self.creds[username.lower()]
         except KeyError:
@@ -20,8 +124,16 @@ class UserManagement:
         try:
             creds = self.creds_for(username)
         except UnknownUser:
+            self._hash(self._unknown.verify, password)
             return False
         except:
             raise
 
-        return creds == password
\ No newline at end of file
+        return self._hash(creds.verify, password)
+
+    def shutdown(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        # Outside the lock, which the done callbacks of running hashes take.
+        if pool is not None:
+            pool.shutdown()
@@ -1,14 +1,16 @@
 # > flask --debug --app playground/wsgi.py run -h "0.0.0.0"
+import io
 import os
+import time
 from functools import wraps
-from glob import glob
 from pathlib import Path
 
-from flask import Flask, abort, flash, redirect, render_template, request, session, url_for
+from flask import Flask, abort, flash, jsonify, redirect, render_template, request, send_from_directory, session, url_for
 from markupsafe import escape
 from werkzeug.utils import secure_filename
 # import the local supporting objects such as:
-# blur, save, mode, fix_lab_path, and UserManagement.
+# blur, save, mode, file_id, apply_batch, unzip_images, derivative, fix_lab_path, EffectCache, EffectsExecutor,
+# ImageIndex, PrincipalCache and UserManagement.
 from playground import *
 
 # A fake user management service used to authenticate users.
@@ -23,14 +25,85 @@ app.after_request(fix_lab_path)
 app.secret_key = b'83jd93Ju#05kt"lfk(*4/'
 app.config['FILE_UPLOAD_FOLDER'] = Path(__file__).parent / 'static' / 'images'
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024
+# The number of results kept in memory by the EffectCache.
+app.config['EFFECT_CACHE_SIZE'] = 1024
+# Effects run in worker processes. 0 workers runs them on the request thread.
+app.config['EFFECT_WORKERS'] = os.cpu_count()
+# The number of effects accepted at once before responding with a 503.
+app.config['EFFECT_MAX_PENDING'] = 2 * os.cpu_count()
+# Seconds to wait for an effect before responding with a 503.
+app.config['EFFECT_TIMEOUT'] = 30
+# The effects engine: 'pillow', 'numpy' or 'tiled'.
+app.config['EFFECT_ENGINE'] = 'pillow'
+# Set to a width and height to decode larger JPEG uploads at a reduced scale still
+# covering it, trading resolution for a faster decode. See effects.open_image.
+app.config['EFFECT_MAX_SIZE'] = None
+# The number of images per gallery page.
+app.config['IMAGES_PER_PAGE'] = 48
+# Seconds a logged in session is trusted before it is checked against user_management again.
+app.config['PRINCIPAL_TTL'] = 300
+# Seconds browsers may reuse a saved image without revalidating it.
+# Saved images are named by their content hash, so they never change.
+app.config['IMAGE_MAX_AGE'] = 365 * 24 * 60 * 60
+# Images are sent with the server's wsgi.file_wrapper, which servers such as
+# gunicorn send with sendfile. Set USE_X_SENDFILE when behind a proxy which
+# supports the X-Sendfile header so it serves the file instead.
+app.config['USE_X_SENDFILE'] = False
+# The number of images accepted by one batch request, including those in zip archives.
+app.config['BATCH_MAX_IMAGES'] = 256
+# The uncompressed bytes accepted from the zip archives of one batch request.
+app.config['BATCH_MAX_ZIP_BYTES'] = 64 * 1024 * 1024
+
+# Effect name -> (effect callable, name of the form field holding its parameter)
+EFFECTS = {
+    'blur': (blur, 'radius'),
+    'mode': (mode, 'size'),
+}
+
+
+def get_effect_cache() -> EffectCache:
+    ''' Return the EffectCache for the FILE_UPLOAD_FOLDER, created on first use. '''
+    cache = app.extensions.get('effect_cache')
+    if cache is None or cache.save_dir != app.config['FILE_UPLOAD_FOLDER']:
+        cache = app.extensions['effect_cache'] = EffectCache(
+            app.config['FILE_UPLOAD_FOLDER'], app.config['EFFECT_CACHE_SIZE'])
+    return cache
+
+
+def get_image_index() -> ImageIndex:
+    ''' Return the ImageIndex for the FILE_UPLOAD_FOLDER, created on first use. '''
+    index = app.extensions.get('image_index')
+    if index is None or index.folder != app.config['FILE_UPLOAD_FOLDER']:
+        index = app.extensions['image_index'] = ImageIndex(app.config['FILE_UPLOAD_FOLDER'])
+    return index
+
+
+def get_effects_executor() -> EffectsExecutor:
+    ''' Return the EffectsExecutor, created on first use. '''
+    executor = app.extensions.get('effects_executor')
+    if executor is None:
+        executor = app.extensions['effects_executor'] = EffectsExecutor(
+            app.config['EFFECT_WORKERS'], app.config['EFFECT_MAX_PENDING'], app.config['EFFECT_TIMEOUT'])
+    return executor
+
+
+def get_principal_cache() -> PrincipalCache:
+    ''' Return the PrincipalCache of verified sessions, created on first use. '''
+    principals = app.extensions.get('principal_cache')
+    if principals is None:
+        principals = app.extensions['principal_cache'] = PrincipalCache(
+            app.config['PRINCIPAL_TTL'], session_lifetime=app.permanent_session_lifetime.total_seconds())
+    return principals
 
 
 def requires_login(func):
-    ''' Decorator used to ensure users are logged in before accessing a route. '''
+    ''' Decorator used to ensure users are logged in before accessing a route.
+        Sessions are verified against user_management, then cached by session id.
+    '''
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        if 'username' in session:
+        if verify_session(session, get_principal_cache(), user_management) is not None:
             return func(*args, **kwargs)
         return redirect(url_for('login'))
 
@@ -50,8 +123,15 @@ def login():
         username = request.form['username']
         password = request.form['password']
 
-        if user_management.authenticate(username, password):
-            session['username'] = username
+        try:
+            authenticated = user_management.authenticate(username, password)
+        except (HashingOverloaded, HashingTimeout) as ex:
+            app.logger.warning(str(ex))
+            flash('Too many logins right now. Please try again shortly.')
+            return render_template('login.html'), 503, {'Retry-After': '1'}
+
+        if authenticated:
+            start_session(session, username)
 
             flash('Welcome back!')
             return redirect(url_for('index'))
@@ -64,7 +144,7 @@ def login():
 
 @app.route('/logout')
 def logout():
-    session.pop('username', None)
+    end_session(session, get_principal_cache())
     return redirect(url_for('index'))
 
 
@@ -75,13 +155,17 @@ def image(name=None):
     if request.method == 'GET':
         # Get all images
         if name is None:
-            # Obtain a list of all images inside the FILE_UPLOAD_FOLDER
-            images = [Path(_file).name for _file in
-                      glob(os.path.join(app.config['FILE_UPLOAD_FOLDER'], '*.png')) +
-                      glob(os.path.join(app.config['FILE_UPLOAD_FOLDER'], '*.jpg')) +
-                      glob(os.path.join(app.config['FILE_UPLOAD_FOLDER'], '*.jpeg'))
-                      ]
-            return render_template('images.html', images=images)
+            # Obtain one page of the images inside the FILE_UPLOAD_FOLDER
+            index = get_image_index()
+            index.refresh()
+            per_page = app.config['IMAGES_PER_PAGE']
+            page = max(request.args.get('page', 1, type=int), 1)
+            sort = request.args.get('sort', 'created')
+            if sort not in SORT_KEYS:
+                abort(404)
+            images = [entry.name for entry in index.page(page, per_page, sort)]
+            return render_template('images.html', images=images, page=page, sort=sort,
+                                   page_count=index.page_count(per_page))
         # Get one image
         return render_template('image.html', image_name=name)
 
@@ -89,24 +173,144 @@ def image(name=None):
     upload = request.files['image']
     effect = request.form.get('effect', 'blur').lower()
 
-    if effect == 'blur':
-        filtered_image = blur(upload, request.form.get('radius'))
-    elif effect == 'mode':
-        filtered_image = mode(upload, request.form.get('size'))
-    else:
+    if effect not in EFFECTS:
         # escape to avoid injection issues should the logs be viewed in a browser.
         app.logger.error(f'unexpected effect: {escape(effect)}')
         abort(500)
 
-    # Don't trust unsanitized user data.
-    extension = secure_filename(upload.filename).rsplit('.', 1)[1]
-    # Requires write permissions to the FILE_UPLOAD_FOLDER
-    # save the file and return the generated name.
-    name = save(filtered_image, extension, app.config['FILE_UPLOAD_FOLDER'])
+    effect_function, parameter_field = EFFECTS[effect]
+    parameter = request.form.get(parameter_field)
+    extension = file_type(upload.filename)
+    # Identical uploads with identical settings reuse the saved result.
+    data = upload.read()
+    cache = get_effect_cache()
+    max_size = app.config['EFFECT_MAX_SIZE']
+    key = cache.key(file_id(data), effect, parameter, extension, max_size)
+    name = cache.get(key)
+    if name is None:
+        # Reject invalid or oversized uploads from their header before
+        # they take up a worker.
+        open_image(io.BytesIO(data))
+        filtered_image = get_effects_executor().run(
+            apply_effect, effect_function, data, parameter, app.config['EFFECT_ENGINE'], max_size)
+        # Requires write permissions to the FILE_UPLOAD_FOLDER
+        # save the file and return the generated name.
+        name = save(filtered_image, extension, app.config['FILE_UPLOAD_FOLDER'])
+        cache.put(key, name)
+        get_image_index().add(name)
     # redirect to the singular image page.
     return redirect(url_for('image', name=name, _method='GET'))
 
 
+def file_type(filename: str) -> str:
+    ''' Return the sanitized extension of an uploaded file name. '''
+    # Don't trust unsanitized user data.
+    name = secure_filename(filename or '')
+    if '.' not in name:
+        raise InvalidImageError('upload has no file extension.')
+    return name.rsplit('.', 1)[1]
+
+
+@app.route('/image/batch', methods=['POST'])
+@requires_login
+def image_batch():
+    ''' Apply one effect to every uploaded image and respond with the saved names as JSON.
+
+        Images are posted as multiple 'images' files. Zip archives among
+        them are expanded in place. The names are in upload order.
+    '''
+    effect = request.form.get('effect', 'blur').lower()
+    if effect not in EFFECTS:
+        app.logger.error(f'unexpected effect: {escape(effect)}')
+        abort(500)
+    effect_function, parameter_field = EFFECTS[effect]
+    parameter = request.form.get(parameter_field)
+
+    max_images = app.config['BATCH_MAX_IMAGES']
+    # What is left of the batch limits, shared by every upload and archive.
+    # Each archive is checked against them before it is extracted.
+    zip_bytes = app.config['BATCH_MAX_ZIP_BYTES']
+    uploads = []
+    for upload in request.files.getlist('images'):
+        if len(uploads) >= max_images:
+            abort(413)
+        if file_type(upload.filename).lower() == 'zip':
+            files = unzip_images(upload.read(), max_images - len(uploads), zip_bytes)
+            zip_bytes -= sum(len(data) for _, data in files)
+            uploads.extend(files)
+        else:
+            uploads.append((upload.filename, upload.read()))
+
+    max_size = app.config['EFFECT_MAX_SIZE']
+    cache = get_effect_cache()
+    keys = []
+    names = []
+    misses = {}
+    for filename, data in uploads:
+        extension = file_type(filename)
+        key = cache.key(file_id(data), effect, parameter, extension, max_size)
+        keys.append(key)
+        names.append(cache.get(key))
+        if names[-1] is None and key not in misses:
+            misses[key] = (extension, data)
+
+    if misses:
+        saved = apply_batch(misses.values(), effect_function, parameter, app.config['FILE_UPLOAD_FOLDER'],
+                            app.config['EFFECT_ENGINE'], get_effects_executor(), max_size)
+        index = get_image_index()
+        for key, name in zip(misses, saved):
+            cache.put(key, name)
+            index.add(name)
+        saved = dict(zip(misses, saved))
+        names = [name or saved[key] for key, name in zip(keys, names)]
+    return jsonify({'images': names})
+
+
+@app.route('/derivatives/<size>/<name>')
+@requires_login
+def derivative_image(size, name):
+    ''' Serve a resized copy of a saved image, generating it on first request.
+
+        Saved images and their derivatives never change, so they are sent
+        with a strong ETag made from the content hash in their name and may
+        be cached for IMAGE_MAX_AGE. Requests which already hold the ETag
+        are answered with a 304 without touching the disk.
+    '''
+    if size != 'full' and size not in DERIVATIVE_SIZES:
+        abort(404)
+    name = secure_filename(name)
+    etag = f'{size}-{name}'
+    if etag in request.if_none_match:
+        return cache_forever(app.response_class(status=304), etag)
+
+    folder = app.config['FILE_UPLOAD_FOLDER']
+    try:
+        relative = derivative(name, size, folder)
+    except (FileNotFoundError, ValueError):
+        abort(404)
+    return cache_forever(send_from_directory(folder, relative, etag=etag), etag)
+
+
+def cache_forever(response, etag: str):
+    ''' Mark a response for an immutable image as cacheable for IMAGE_MAX_AGE. '''
+    max_age = app.config['IMAGE_MAX_AGE']
+    response.set_etag(etag)
+    # Private because images are only served to logged in users.
+    response.cache_control.private = True
+    response.cache_control.public = False
+    response.cache_control.no_cache = None
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = True
+    response.expires = time.time() + max_age
+    return response
+
+
+@app.route('/effects/cache')
+@requires_login
+def effect_cache_stats():
+    return jsonify(get_effect_cache().stats())
+
+
 @app.errorhandler(404)
 def error_404(e):
     return render_template('404.html'), 404
@@ -121,3 +325,10 @@ def error_500(e):
 def error_invalid_image(e):
     return render_template('invalid-image.html'), 500
 
+
+@app.errorhandler(Overloaded)
+@app.errorhandler(EffectTimeout)
+def error_effects_unavailable(e):
+    app.logger.warning(str(e))
+    return render_template('503.html'), 503, {'Retry-After': '1'}
+
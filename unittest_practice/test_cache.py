@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from playground.cache import EffectCache
+
+
+class EffectCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.save_dir = Path(self.temp_dir.name)
+        self.cache = EffectCache(self.save_dir, max_entries=2)
+        self.key = EffectCache.key('abc', 'blur', 20, 'png')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def add_image(self, name):
+        (self.save_dir / name).write_bytes(b'image')
+        return name
+
+    def test_key(self):
+        ''' keys depend on every input '''
+        self.assertEqual(self.key, EffectCache.key('abc', 'blur', 20, 'png'))
+        self.assertNotEqual(self.key, EffectCache.key('abc', 'blur', 21, 'png'))
+        self.assertNotEqual(self.key, EffectCache.key('abc', 'mode', 20, 'png'))
+        self.assertNotEqual(self.key, EffectCache.key('abc', 'blur', 20, 'jpg'))
+
+    def test_miss_then_hit(self):
+        ''' can cache image names '''
+        self.assertIsNone(self.cache.get(self.key))
+        self.cache.put(self.key, self.add_image('out.png'))
+        self.assertEqual(self.cache.get(self.key), 'out.png')
+        self.assertEqual(self.cache.stats()['misses'], 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_lru_eviction(self):
+        ''' evicts the least recently used memory entry '''
+        for n in range(3):
+            self.cache.put(str(n), self.add_image(f'{n}.png'))
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.assertEqual(self.cache.stats()['entries'], 2)
+        # The evicted entry is still found on disk.
+        self.assertEqual(self.cache.get('0'), '0.png')
+        self.assertEqual(self.cache.stats()['disk_hits'], 1)
+
+    def test_disk_tier_shared(self):
+        ''' new cache instances read the disk tier '''
+        self.cache.put(self.key, self.add_image('out.png'))
+        cache = EffectCache(self.save_dir)
+        self.assertEqual(cache.get(self.key), 'out.png')
+        self.assertEqual(cache.stats()['disk_hits'], 1)
+
+    def test_deleted_image(self):
+        ''' entries for deleted images are misses '''
+        self.cache.put(self.key, self.add_image('out.png'))
+        (self.save_dir / 'out.png').unlink()
+        self.assertIsNone(self.cache.get(self.key))
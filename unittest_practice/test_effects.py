@@ -1,4 +1,7 @@
+import io
+import tempfile
 import unittest
+import zipfile
 from pathlib import Path
 from unittest.mock import patch
 
@@ -70,6 +73,28 @@ class Effects(unittest.TestCase):
         # End test code
         ###############################################################################
 
+    def test_image_id(self):
+        ''' image_id matches hashing the full tobytes copy '''
+        with open(IMAGE_FILE, 'rb') as img:
+            self.assertEqual(effects.image_id(Image.open(img)), IMAGE_HASH)
+        # Tall enough to be hashed in several strips.
+        tall = Image.effect_noise((700, 3000), 32).convert('RGB')
+        self.assertEqual(effects.image_id(tall), effects.file_id(tall.tobytes()))
+
+    def test_derivative(self):
+        ''' derivatives are resized once and reused '''
+        with tempfile.TemporaryDirectory() as save_dir:
+            name = effects.save(Image.open(IMAGE_FILE), 'png', save_dir)
+            self.assertEqual(effects.derivative(name, 'full', save_dir), name)
+
+            relative = effects.derivative(name, 'thumb', save_dir)
+            with Image.open(Path(save_dir) / relative) as thumb:
+                self.assertLessEqual(max(thumb.size), effects.DERIVATIVE_SIZES['thumb'])
+
+            with patch('playground.effects.Image') as image_module:
+                self.assertEqual(effects.derivative(name, 'thumb', save_dir), relative)
+                image_module.open.assert_not_called()
+
     @patch('playground.effects.Image')
     @patch('playground.effects.ImageFilter')
     def test_blur(self, image_filter, image_module):
@@ -92,6 +117,8 @@ class Effects(unittest.TestCase):
         # Add test code below
         # Mock objects
         mock_img = image_module.open.return_value
+        # open_image checks the pixel budget before filtering.
+        mock_img.size = (100, 100)
         mock_filter_obj = image_filter.BoxBlur.return_value
 
         # Call function under test
@@ -126,6 +153,8 @@ class Effects(unittest.TestCase):
         # Add test code below
         # Mock objects
         mock_img = image_module.open.return_value
+        # open_image checks the pixel budget before filtering.
+        mock_img.size = (100, 100)
         mock_filter_obj = image_filter.ModeFilter.return_value
 
         # Call function under test
@@ -163,3 +192,59 @@ class Effects(unittest.TestCase):
         # End test code
         ###############################################################################
 
+
+    def test_sniff(self):
+        ''' formats are identified from their first bytes '''
+        self.assertEqual(effects.sniff(IMAGE_FILE), 'PNG')
+        self.assertIsNone(effects.sniff(Path(__file__)))
+        upload = io.BytesIO(b'\xff\xd8\xff\xe0 jpeg data')
+        upload.seek(2)
+        self.assertEqual(effects.sniff(io.BytesIO(upload.getvalue())), 'JPEG')
+        # File objects are left where they were.
+        effects.sniff(upload)
+        self.assertEqual(upload.tell(), 2)
+
+    def test_pixel_budget(self):
+        ''' images over MAX_PIXELS are rejected before decoding '''
+        with patch('playground.effects.MAX_PIXELS', 10), \
+                patch.object(Image.Image, 'load') as load:
+            with self.assertRaises(effects.InvalidImageError):
+                effects.open_image(IMAGE_FILE)
+            load.assert_not_called()
+
+    def test_max_size(self):
+        ''' only JPEG uploads are decoded at a reduced scale covering max_size '''
+        for image_format, size in (('jpeg', (200, 150)), ('png', (800, 600))):
+            upload = io.BytesIO()
+            Image.new('RGB', (800, 600), 'teal').save(upload, image_format)
+            upload.seek(0)
+            img = effects.open_image(upload, max_size=100)
+            self.assertEqual(img.size, size)
+        upload.seek(0)
+        self.assertEqual(effects.open_image(upload).size, (800, 600))
+
+    def test_apply_batch(self):
+        ''' batches save every image and return the names in order '''
+        data = IMAGE_FILE.read_bytes()
+        with tempfile.TemporaryDirectory() as save_dir:
+            names = effects.apply_batch([('png', data), ('bmp', data)], effects.mode, 3, save_dir)
+            self.assertEqual([name.rsplit('.', 1)[1] for name in names], ['png', 'bmp'])
+            for name in names:
+                self.assertTrue((Path(save_dir) / name).exists())
+            # One invalid upload rejects the batch before any work.
+            with patch('playground.effects._apply_and_save') as apply_and_save:
+                with self.assertRaises(effects.InvalidImageError):
+                    effects.apply_batch([('png', data), ('png', b'not an image')], effects.mode, 3, save_dir)
+                apply_and_save.assert_not_called()
+
+    def test_unzip_images(self):
+        ''' zip archives are expanded within their limits '''
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('folder/a.png', b'a')
+            zip_file.writestr('b.jpg', b'bb')
+        data = archive.getvalue()
+        self.assertEqual(effects.unzip_images(data, 2, 3), [('a.png', b'a'), ('b.jpg', b'bb')])
+        self.assertRaises(effects.InvalidImageError, effects.unzip_images, data, 1, 3)
+        self.assertRaises(effects.InvalidImageError, effects.unzip_images, data, 2, 2)
+        self.assertRaises(effects.InvalidImageError, effects.unzip_images, b'not a zip', 2, 3)
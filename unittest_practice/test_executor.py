@@ -0,0 +1,69 @@
+import io
+import time
+import unittest
+
+from PIL import Image
+
+from playground import effects
+from playground.executor import EffectsExecutor, EffectTimeout, Overloaded, apply_effect
+
+
+def echo(fp, parameter, max_size, engine):
+    return fp.read(), parameter
+
+
+class EffectsExecutorTests(unittest.TestCase):
+    def setUp(self):
+        self.executor = EffectsExecutor(max_workers=1, max_pending=1, timeout=5)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_run(self):
+        ''' runs functions in a worker process '''
+        self.assertEqual(self.executor.run(apply_effect, echo, b'data', 3), (b'data', 3))
+
+    def test_inline(self):
+        ''' runs functions on the calling thread without workers '''
+        executor = EffectsExecutor(max_workers=0)
+        self.assertEqual(executor.run(apply_effect, echo, b'data', None), (b'data', None))
+
+    def test_overloaded(self):
+        ''' rejects jobs beyond max_pending '''
+        future = self.executor.submit(time.sleep, 0.5)
+        with self.assertRaises(Overloaded):
+            self.executor.submit(time.sleep, 0)
+        future.result()
+        # The slot is released once the job finishes, by a callback which
+        # may run just after result() returns.
+        deadline = time.monotonic() + 5
+        while self.executor.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.executor.submit(time.sleep, 0).result()
+
+    def test_timeout(self):
+        ''' raises EffectTimeout for slow jobs '''
+        self.executor.timeout = 0.1
+        with self.assertRaises(EffectTimeout):
+            self.executor.run(time.sleep, 1)
+
+    def test_map(self):
+        ''' runs many jobs through the workers and keeps their order '''
+        executor = EffectsExecutor(max_workers=2, timeout=5)
+        try:
+            jobs = [(echo, str(n).encode(), n) for n in range(10)]
+            self.assertEqual(executor.map(apply_effect, jobs), [(str(n).encode(), n) for n in range(10)])
+        finally:
+            executor.shutdown()
+        inline = EffectsExecutor(max_workers=0)
+        self.assertEqual(inline.map(apply_effect, [(echo, b'data', 1)]), [(b'data', 1)])
+
+    def test_tiled(self):
+        ''' runs the tiled engine in a worker without starting a pool inside it '''
+        upload = io.BytesIO()
+        Image.effect_noise((64, 48), 64).convert('RGB').save(upload, 'png')
+        data = upload.getvalue()
+        result = self.executor.run(apply_effect, effects.blur, data, 2, 'tiled')
+        self.assertEqual(result.tobytes(), effects.blur(io.BytesIO(data), 2).tobytes())
+        # Hung when each worker kept its own tiled pool.
+        self.executor.shutdown()
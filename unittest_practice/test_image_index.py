@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from playground.image_index import ImageIndex
+
+
+class ImageIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.temp_dir.name)
+        self.index = ImageIndex(self.folder)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, size=1, created=0):
+        path = self.folder / name
+        path.write_bytes(b'x' * size)
+        os.utime(path, (created, created))
+        return name
+
+    def test_refresh(self):
+        ''' picks up added and removed files '''
+        self.write('a.png')
+        self.write('notes.txt')
+        self.index.refresh()
+        self.assertEqual(len(self.index), 1)
+
+        self.write('b.JPG')
+        (self.folder / 'a.png').unlink()
+        self.index.refresh()
+        self.assertEqual([entry.name for entry in self.index.page()], ['b.JPG'])
+        self.assertEqual(self.index.page()[0].file_type, 'jpg')
+
+    def test_add(self):
+        ''' indexes saved images without rescanning '''
+        self.index.refresh()
+        self.index.add(self.write('a.png', size=5))
+        self.assertIn('a.png', self.index)
+        self.assertEqual(self.index.page()[0].size, 5)
+        # Types refresh doesn't list aren't added either.
+        self.index.add(self.write('c.bmp'))
+        self.assertNotIn('c.bmp', self.index)
+
+    def test_add_concurrent_save(self):
+        ''' still finds files saved by others around an add '''
+        self.index.refresh()
+        self.write('other.png')
+        self.index.add(self.write('a.png'))
+        self.index.refresh()
+        self.assertIn('other.png', self.index)
+
+    def test_pages(self):
+        ''' pages are sorted and sliced '''
+        for n in range(5):
+            self.write(f'{n}.png', size=5 - n, created=n)
+        self.index.refresh()
+
+        def names(*args, **kwargs):
+            return [entry.name for entry in self.index.page(*args, **kwargs)]
+
+        self.assertEqual(names(1, 2), ['4.png', '3.png'])
+        self.assertEqual(names(3, 2), ['0.png'])
+        self.assertEqual(names(4, 2), [])
+        self.assertEqual(names(1, 2, reverse=False), ['0.png', '1.png'])
+        self.assertEqual(names(1, 2, sort='size', reverse=False), ['4.png', '3.png'])
+        self.assertEqual(names(2, 2, sort='name', reverse=False), ['2.png', '3.png'])
+        self.assertEqual(self.index.page_count(2), 3)
+
+    def test_missing_folder(self):
+        ''' a missing folder is an empty index '''
+        index = ImageIndex(self.folder / 'missing')
+        index.refresh()
+        self.assertEqual(index.page(), [])
@@ -0,0 +1,59 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, Response, render_template
+from jinja2 import DictLoader
+
+from playground.lab_path import LabPathRewriter, fix_lab_path
+
+PAGE = b'''<a href="/login">x</a><form action='/image/'></form>
+<img src="/static/a.png"><img src="//cdn.example.com/b.png">
+<input type="/not-a-link"><a href="https://example.com/">y</a>'''
+EXPECTED = b'''<a href="/app/login">x</a><form action='/app/image/'></form>
+<img src="/app/static/a.png"><img src="//cdn.example.com/b.png">
+<input type="/not-a-link"><a href="https://example.com/">y</a>'''
+
+
+class LabPathRewriterTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.jinja_loader = DictLoader({'page.html': PAGE.decode()})
+        self.rewriter = LabPathRewriter()
+
+    def test_rewrite(self):
+        ''' rewrites only local href, action and src URLs '''
+        self.assertEqual(self.rewriter.rewrite(PAGE), EXPECTED)
+
+    def test_chunks(self):
+        ''' rewrites URLs split across chunks '''
+        for size in (1, 3, 7, 50):
+            chunks = [PAGE[n:n + size] for n in range(0, len(PAGE), size)]
+            self.assertEqual(b''.join(self.rewriter.rewrite_chunks(chunks)), EXPECTED)
+
+    def test_template_cache(self):
+        ''' rewrites each template output once '''
+        with self.app.test_request_context():
+            for _ in range(2):
+                response = self.rewriter(Response(render_template('page.html'), mimetype='text/html'))
+                self.assertEqual(response.get_data(), EXPECTED)
+            self.assertEqual((self.rewriter.misses, self.rewriter.hits), (1, 1))
+            self.assertIsNotNone(response.get_etag()[0])
+
+    def test_streamed(self):
+        ''' rewrites streamed responses without buffering them '''
+        chunks = iter([PAGE[:10], PAGE[10:]])
+        with self.app.test_request_context():
+            response = self.rewriter(Response(chunks, mimetype='text/html'))
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(b''.join(response.iter_encoded()), EXPECTED)
+
+    def test_fix_lab_path(self):
+        ''' rewrites redirects and skips everything under test '''
+        with self.app.test_request_context(), patch.dict(os.environ):
+            os.environ.pop('APP_UNDER_TEST', None)
+            response = fix_lab_path(Response(status=302, headers={'Location': '/login'}))
+            self.assertEqual(response.location, '/app/login')
+            os.environ['APP_UNDER_TEST'] = '1'
+            response = fix_lab_path(Response(PAGE, mimetype='text/html'))
+            self.assertEqual(response.get_data(), PAGE)
@@ -0,0 +1,60 @@
+import unittest
+from pathlib import Path
+
+from PIL import Image, ImageFilter
+
+from playground import effects, numpy_effects
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+IMAGE_FILE = Path(__file__).parent / 'images' / 'python_logo.png'
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class NumpyEffects(unittest.TestCase):
+    def setUp(self):
+        self.images = [
+            Image.open(IMAGE_FILE),
+            Image.effect_noise((90, 60), 64).convert('RGB'),
+            Image.effect_noise((90, 60), 64),
+        ]
+
+    def difference(self, first, second):
+        return np.abs(np.asarray(first, dtype=int) - np.asarray(second, dtype=int)).max()
+
+    def test_box_blur(self):
+        ''' box_blur matches Pillow to within 1 '''
+        for img in self.images:
+            for radius in (1, 2.5, 20, 200, (3, 0)):
+                expected = img.filter(ImageFilter.BoxBlur(radius))
+                self.assertLessEqual(self.difference(numpy_effects.box_blur(img, radius), expected), 1)
+
+    def test_mode_filter(self):
+        ''' mode_filter matches Pillow exactly '''
+        for img in self.images + [self.images[0].convert('P')]:
+            for size in (3, 4, 10):
+                expected = img.filter(ImageFilter.ModeFilter(size))
+                result = numpy_effects.mode_filter(img, size)
+                self.assertEqual(result.mode, img.mode)
+                self.assertEqual(self.difference(result, expected), 0)
+
+    def test_engine_selection(self):
+        ''' effects select the engine per call '''
+        blurred = effects.blur(IMAGE_FILE, 5, engine='numpy')
+        self.assertLessEqual(self.difference(blurred, effects.blur(IMAGE_FILE, 5)), 1)
+        with self.assertRaises(ValueError):
+            effects.mode(IMAGE_FILE, engine='fortran')
+
+    def test_unsupported_mode(self):
+        ''' unsupported image modes raise ValueError '''
+        with self.assertRaises(ValueError):
+            numpy_effects.box_blur(Image.new('I', (4, 4)), 1)
+        # Palette indices aren't colours, so like Pillow box_blur rejects them.
+        palette = self.images[0].convert('P')
+        with self.assertRaises(ValueError):
+            palette.filter(ImageFilter.BoxBlur(2))
+        with self.assertRaises(ValueError):
+            numpy_effects.box_blur(palette, 2)
@@ -0,0 +1,79 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from playground.principals import PrincipalCache, end_session, start_session, verify_session
+from playground.userman import UserManagement
+
+
+class PrincipalCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.users = UserManagement(iterations=1000, max_workers=0)
+        self.users.upsert_user('admin', 'magic')
+        self.principals = PrincipalCache(ttl=60)
+        self.session = {}
+
+    def test_cached(self):
+        ''' verifies a session once then trusts its session id '''
+        start_session(self.session, 'admin')
+        self.assertEqual(verify_session(self.session, self.principals, self.users), 'admin')
+        with patch.object(self.users, 'creds_for') as creds_for:
+            self.assertEqual(verify_session(self.session, self.principals, self.users), 'admin')
+        creds_for.assert_not_called()
+        self.assertEqual(self.principals.stats()['hits'], 1)
+
+    def test_ttl(self):
+        ''' checks sessions again once their entry expires '''
+        principals = PrincipalCache(ttl=0)
+        start_session(self.session, 'admin')
+        verify_session(self.session, principals, self.users)
+        del self.users.creds['admin']
+        self.assertIsNone(verify_session(self.session, principals, self.users))
+        self.assertNotIn('username', self.session)
+
+    def test_logout(self):
+        ''' revokes the session id on logout '''
+        start_session(self.session, 'admin')
+        sid = self.session['sid']
+        verify_session(self.session, self.principals, self.users)
+        replayed = dict(self.session)
+        end_session(self.session, self.principals)
+        self.assertIsNone(self.principals.get(sid))
+        self.assertIsNone(verify_session(self.session, self.principals, self.users))
+        # A copy of the cookie from before the logout is rejected too.
+        self.assertIsNone(verify_session(replayed, self.principals, self.users))
+        self.assertIsNone(verify_session(replayed, self.principals, self.users))
+        self.assertEqual(replayed, {})
+
+    def test_revoked_sessions_expire(self):
+        ''' forgets revoked session ids once their sessions expire '''
+        principals = PrincipalCache(session_lifetime=60)
+        principals.revoke('old', issued=time.time() - 61)
+        principals.revoke('new')
+        self.assertFalse(principals.is_session_revoked('old'))
+        self.assertTrue(principals.is_session_revoked('new'))
+
+    def test_revoke_user(self):
+        ''' rejects every earlier session of a revoked user '''
+        start_session(self.session, 'admin')
+        verify_session(self.session, self.principals, self.users)
+        time.sleep(0.01)
+        self.principals.revoke_user('Admin')
+        self.assertIsNone(verify_session(self.session, self.principals, self.users))
+        # Logging in again works.
+        start_session(self.session, 'admin')
+        self.assertEqual(verify_session(self.session, self.principals, self.users), 'admin')
+
+    def test_legacy_session(self):
+        ''' gives sessions without a session id one '''
+        self.session['username'] = 'admin'
+        self.assertEqual(verify_session(self.session, self.principals, self.users), 'admin')
+        self.assertIn('sid', self.session)
+
+    def test_lru(self):
+        ''' keeps at most max_entries sessions '''
+        principals = PrincipalCache(max_entries=2)
+        for n in range(3):
+            principals.put(str(n), 'admin')
+        self.assertIsNone(principals.get('0'))
+        self.assertEqual(principals.get('2'), 'admin')
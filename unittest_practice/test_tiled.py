@@ -0,0 +1,46 @@
+import unittest
+
+from PIL import Image, ImageFilter
+
+from playground import tiled
+
+
+class TiledFilterTests(unittest.TestCase):
+    def setUp(self):
+        self.img = Image.effect_noise((97, 61), 64).convert('RGB')
+
+    def tearDown(self):
+        tiled.shutdown()
+
+    def assertSameImage(self, first, second):
+        self.assertEqual(first.mode, second.mode)
+        self.assertEqual(first.size, second.size)
+        self.assertEqual(first.tobytes(), second.tobytes())
+
+    def test_box_blur(self):
+        ''' can blur in strips with the same result as a single pass '''
+        for radius in (1, 2.5, 7, (3, 0.5)):
+            image_filter = ImageFilter.BoxBlur(radius)
+            self.assertSameImage(tiled.tiled_filter(self.img, image_filter, workers=2), self.img.filter(image_filter))
+
+    def test_mode_filter(self):
+        ''' can mode filter in strips with the same result as a single pass '''
+        img = Image.effect_noise((97, 61), 16).quantize(8).convert('RGB')
+        for size in (3, 5):
+            image_filter = ImageFilter.ModeFilter(size)
+            self.assertSameImage(tiled.tiled_filter(img, image_filter, workers=2), img.filter(image_filter))
+
+    def test_palette(self):
+        ''' keeps the palette of P images '''
+        img = self.img.quantize(16)
+        image_filter = ImageFilter.ModeFilter(3)
+        result = tiled.tiled_filter(img, image_filter, workers=2)
+        self.assertSameImage(result, img.filter(image_filter))
+        self.assertEqual(result.getpalette(), img.getpalette())
+
+    def test_unsupported(self):
+        ''' rejects other filters and modes '''
+        with self.assertRaises(ValueError):
+            tiled.tiled_filter(self.img, ImageFilter.GaussianBlur(2), workers=2)
+        with self.assertRaises(ValueError):
+            tiled.tiled_filter(self.img.convert('I'), ImageFilter.BoxBlur(2), workers=2)
@@ -1,13 +1,18 @@
+import time
 import unittest
 from playground import userman
 
 
 class UserManager(unittest.TestCase):
     def setUp(self):
-        self.um = userman.UserManagement()
+        # Few iterations keep the tests fast.
+        self.um = userman.UserManagement(iterations=1000)
         self.username = 'admin'
         self.password = 'magic'
 
+    def tearDown(self):
+        self.um.shutdown()
+
     def test_upsert_user_insert(self):
         ''' can insert new users '''
         ###############################################################################
@@ -58,7 +63,7 @@ class UserManager(unittest.TestCase):
         self.um.upsert_user('admin', 'x')
         after = self.um.creds[self.username]
         assert before != after
-        assert after == 'x'
+        assert after.verify('x')
 
     def test_creds_for(self):
         ''' can get creds by username '''
@@ -68,14 +73,16 @@ class UserManager(unittest.TestCase):
         # Test Requirements (UserManagement.creds_for):
         #
         # The UserManagement.creds_for method accepts a username as input and
-        # returns the user's password - if the user exists. An UnknownUser exception
+        # returns the user's hashed password - if the user exists. An UnknownUser exception
         # is raised if the user does not exist.
         #
         # 1.) Ensure the creds_for method returns a non-None value for existing users.
         # 2.) Ensure the creds_for method raises an UnknownUser exception for non-existent users.
         ###############################################################################
         # Add test code below
-        self.assertEqual(self.um.creds_for(self.username), self.password)
+        creds = self.um.creds_for(self.username)
+        self.assertIsInstance(creds, userman.HashedPassword)
+        self.assertTrue(creds.verify(self.password))
 
         with self.assertRaises(userman.UnknownUser):
             self.um.creds_for("ghost")
@@ -112,3 +119,39 @@ class UserManager(unittest.TestCase):
         self.assertFalse(self.um.authenticate(self.username, "wrong"))
         # End test code
         ###############################################################################
+
+    def test_hashed_password(self):
+        ''' stores salted hashes rather than passwords '''
+        self.add_user()
+        self.add_user('other')
+        creds = self.um.creds_for(self.username)
+        assert self.password.encode() not in creds.digest
+        assert creds.salt != self.um.creds_for('other').salt
+        assert creds.digest != self.um.creds_for('other').digest
+        assert creds.iterations == 1000
+        self.assertFalse(creds.verify('wrong'))
+
+    def test_inline(self):
+        ''' can hash on the calling thread '''
+        um = userman.UserManagement(iterations=1000, max_workers=0)
+        um.upsert_user(self.username, self.password)
+        self.assertTrue(um.authenticate(self.username, self.password))
+        self.assertFalse(um.authenticate('ghost', self.password))
+
+    def test_overloaded(self):
+        ''' rejects hashes beyond max_pending and times out slow ones '''
+        um = userman.UserManagement(iterations=1000, max_workers=1, max_pending=1, timeout=0.05)
+        try:
+            with self.assertRaises(userman.HashingTimeout):
+                um._hash(time.sleep, 0.5)
+            # The timed out hash keeps its slot until it finishes.
+            with self.assertRaises(userman.HashingOverloaded):
+                um.upsert_user(self.username, self.password)
+            deadline = time.monotonic() + 5
+            while um.pending and time.monotonic() < deadline:
+                time.sleep(0.01)
+            um.timeout = 5
+            um.upsert_user(self.username, self.password)
+            self.assertTrue(um.authenticate(self.username, self.password))
+        finally:
+            um.shutdown()
@@ -1,6 +1,13 @@
+import io
 import os
+import tempfile
 import unittest
+import zipfile
 from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
 from  playground import wsgi
 # Disable playground.__init__.fix_lab_path which is used to fix the lab environment URL paths.
 # Only required to run the flask app over HTTP at: /app
@@ -99,6 +106,15 @@ class LoginIntegration(WSGI.WSGIBase):
             # Nothing should be added to the session.
             assert not wsgi.session.keys()
 
+    def test_login_overloaded(self):
+        ''' turns logins away with a 503 when password hashing is overloaded '''
+        with wsgi.app.test_client() as client:
+            with patch.object(wsgi.user_management, 'authenticate', side_effect=wsgi.HashingOverloaded('busy')):
+                response = client.post(self.login, data=self.correct_creds_dict)
+            assert response.status_code == 503
+            assert b'too many logins' in response.data.lower()
+            assert not wsgi.session.keys()
+
     def test_login_get(self):
         ''' ensure accessible login form '''
         ###############################################################################
@@ -389,3 +405,191 @@ class CustomErrors(WSGI.WSGIBase):
         # End test code
         ###############################################################################
 
+
+
+class EffectCacheIntegration(WSGI.WSGIBase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.upload_folder = wsgi.app.config['FILE_UPLOAD_FOLDER']
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = Path(self.temp_dir.name)
+        wsgi.app.extensions.pop('effect_cache', None)
+
+    def tearDown(self):
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = self.upload_folder
+        wsgi.app.extensions.pop('effect_cache', None)
+        self.temp_dir.cleanup()
+
+    def post_image(self, client):
+        with IMAGE_FILE.open('rb') as img:
+            return client.post(self.image, data={'image': img, 'effect': 'mode'})
+
+    def test_repeat_upload_uses_cache(self):
+        ''' repeated uploads skip the effect '''
+        with wsgi.app.test_client() as client:
+            with client.session_transaction() as session:
+                session['username'] = self.correct_creds[0]
+
+            first = self.post_image(client)
+            with patch('playground.wsgi.mode') as mode:
+                # EFFECTS holds a reference to the original function.
+                with patch.dict(wsgi.EFFECTS, {'mode': (mode, 'size')}):
+                    second = self.post_image(client)
+            mode.assert_not_called()
+
+            assert first.status_code == second.status_code == 302
+            assert first.headers['Location'] == second.headers['Location']
+            stats = client.get('/effects/cache').get_json()
+            assert stats['hits'] == 1
+            assert stats['misses'] == 1
+
+
+    def test_max_size(self):
+        ''' EFFECT_MAX_SIZE reduces the JPEG decode, cached separately per size '''
+        upload = io.BytesIO()
+        Image.new('RGB', (256, 128), 'teal').save(upload, 'jpeg')
+
+        def post_jpeg(client):
+            return client.post(self.image, data={'image': (io.BytesIO(upload.getvalue()), 'teal.jpg'),
+                                                 'effect': 'mode'})
+
+        with wsgi.app.test_client() as client:
+            with client.session_transaction() as session:
+                session['username'] = self.correct_creds[0]
+
+            full = post_jpeg(client)
+            with patch.dict(wsgi.app.config, {'EFFECT_MAX_SIZE': 16}):
+                reduced = post_jpeg(client)
+            assert full.headers['Location'] != reduced.headers['Location']
+            sizes = []
+            for response in (full, reduced):
+                name = response.headers['Location'].rsplit('/', 1)[-1]
+                with Image.open(Path(self.temp_dir.name) / name) as img:
+                    sizes.append(img.size)
+            assert sizes == [(256, 128), (32, 16)]
+
+
+class EffectsExecutorIntegration(WSGI.WSGIBase):
+    def test_overloaded(self):
+        ''' overloaded effects respond with a 503 '''
+        with wsgi.app.test_client() as client:
+            with client.session_transaction() as session:
+                session['username'] = self.correct_creds[0]
+
+            with patch('playground.wsgi.get_effect_cache') as cache, \
+                    patch('playground.wsgi.get_effects_executor') as executor:
+                cache.return_value.get.return_value = None
+                executor.return_value.run.side_effect = wsgi.Overloaded('full')
+                with IMAGE_FILE.open('rb') as img:
+                    response = client.post(self.image, data={'image': img})
+
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+
+
+class DerivativeIntegration(WSGI.WSGIBase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.upload_folder = wsgi.app.config['FILE_UPLOAD_FOLDER']
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = Path(self.temp_dir.name)
+        self.name = wsgi.save(Image.open(IMAGE_FILE), 'png', self.temp_dir.name)
+
+    def tearDown(self):
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = self.upload_folder
+        self.temp_dir.cleanup()
+
+    def test_gallery_uses_thumbnails(self):
+        ''' the gallery references thumbnails '''
+        with wsgi.app.test_client() as client:
+            with client.session_transaction() as session:
+                session['username'] = self.correct_creds[0]
+
+            response = client.get(self.image)
+            assert f'/derivatives/thumb/{self.name}'.encode() in response.data
+
+            thumb = client.get(f'/derivatives/thumb/{self.name}')
+            assert thumb.status_code == 200
+            assert thumb.mimetype == 'image/png'
+            assert client.get(f'/derivatives/huge/{self.name}').status_code == 404
+            assert client.get('/derivatives/thumb/missing.png').status_code == 404
+
+    def test_image_caching(self):
+        ''' images are sent with cache validators and revalidated with a 304 '''
+        with wsgi.app.test_client() as client:
+            with client.session_transaction() as session:
+                session['username'] = self.correct_creds[0]
+
+            url = f'/derivatives/full/{self.name}'
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.headers['Cache-Control'] == 'private, max-age=31536000, immutable'
+            assert self.name.split('.')[0] in response.headers['ETag']
+
+            with patch('playground.wsgi.derivative') as derivative:
+                revalidated = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+            derivative.assert_not_called()
+            assert revalidated.status_code == 304
+            assert revalidated.headers['ETag'] == response.headers['ETag']
+            assert client.get(f'/derivatives/thumb/{self.name}',
+                              headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+
+class BatchIntegration(WSGI.WSGIBase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.upload_folder = wsgi.app.config['FILE_UPLOAD_FOLDER']
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = Path(self.temp_dir.name)
+        self.batch = '/image/batch'
+
+    def tearDown(self):
+        wsgi.app.config['FILE_UPLOAD_FOLDER'] = self.upload_folder
+        wsgi.app.extensions.pop('effect_cache', None)
+        self.temp_dir.cleanup()
+
+    def test_batch(self):
+        ''' batches of images and zip archives respond with every saved name '''
+        data = IMAGE_FILE.read_bytes()
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('zipped.bmp', data)
+        with wsgi.app.test_client() as client:
+            with client.session_transaction() as session:
+                session['username'] = self.correct_creds[0]
+
+            response = client.post(self.batch, data={'effect': 'mode', 'images': [
+                (io.BytesIO(data), 'one.png'),
+                (io.BytesIO(data), 'two.png'),
+                (io.BytesIO(archive.getvalue()), 'more.zip'),
+            ]})
+            assert response.status_code == 200
+            names = response.get_json()['images']
+            assert len(names) == 3
+            assert names[0] == names[1]
+            assert names[2].endswith('.bmp')
+            assert (Path(self.temp_dir.name) / names[2]).exists()
+
+            with patch.dict(wsgi.app.config, {'BATCH_MAX_IMAGES': 1}):
+                response = client.post(self.batch, data={'images': [
+                    (io.BytesIO(data), 'one.png'), (io.BytesIO(data), 'two.png')]})
+            assert response.status_code == 413
+
+            # The limits apply to the whole request, not to each archive.
+            with patch.dict(wsgi.app.config, {'BATCH_MAX_ZIP_BYTES': len(data) * 3 // 2}):
+                response = client.post(self.batch, data={'images': [
+                    (io.BytesIO(archive.getvalue()), 'one.zip'), (io.BytesIO(archive.getvalue()), 'two.zip')]})
+            assert response.status_code == 500
+            pair = io.BytesIO()
+            with zipfile.ZipFile(pair, 'w') as zip_file:
+                zip_file.writestr('one.bmp', data)
+                zip_file.writestr('two.bmp', data)
+            with patch.dict(wsgi.app.config, {'BATCH_MAX_IMAGES': 2}):
+                response = client.post(self.batch, data={'images': [
+                    (io.BytesIO(data), 'one.png'), (io.BytesIO(pair.getvalue()), 'pair.zip')]})
+            assert response.status_code == 500
+
+    def test_batch_no_auth(self):
+        ''' batches require a login '''
+        with wsgi.app.test_client() as client:
+            assert client.post(self.batch).status_code == 302
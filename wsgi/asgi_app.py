@@ -0,0 +1,161 @@
+"""
+A WSGI server calls the application once per request and waits for it to return, so a handler which
+waits on I/O holds a whole worker thread while doing nothing.
+
+ASGI is the asynchronous successor to WSGI. An ASGI application is a coroutine called with the request
+details (scope) and two coroutines used to receive request messages and send response messages. While one
+request awaits I/O the event loop runs others, so a single thread can serve many slow requests at once.
+
+The ASGIAdapter below serves the routes registered with Application.route over ASGI:
+    - async def handlers, and async generators, run on the event loop.
+    - Other handlers run in a thread pool so they can't block the event loop.
+
+Run it with any ASGI server, for example:
+    > uvicorn asgi_app:asgi_app --port 5000
+"""
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from wsgi_app import FILE_BLOCK_SIZE, RequestArgs, app, query_display
+
+# Marks the end of an iterator run in the thread pool.
+_DONE = object()
+
+
+class ASGIAdapter():
+    ''' A callable class serving an Application's routes as an ASGI application.
+
+        Responses match the WSGI Application: bytes are followed by the query string
+        display, while generators, async generators and file-like objects are streamed.
+
+        Args:
+            app         | The Application whose routes are served.
+            max_threads | The number of threads running sync handlers.
+                          Defaults to the ThreadPoolExecutor default.
+    '''
+
+    def __init__(self, app, max_threads=None):
+        self.app = app
+        self.max_threads = max_threads
+        self._pool = None
+
+    def _run(self, function, *args):
+        ''' Run a blocking callable in the thread pool without blocking the event loop. '''
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_threads, thread_name_prefix='asgi')
+        return asyncio.get_running_loop().run_in_executor(self._pool, function, *args)
+
+    async def _iterate(self, chunks):
+        # Each chunk of a sync iterable is produced in the thread pool.
+        try:
+            while (chunk := await self._run(next, chunks, _DONE)) is not _DONE:
+                yield chunk
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    async def _read(self, file):
+        try:
+            while chunk := await self._run(file.read, FILE_BLOCK_SIZE):
+                yield chunk
+        finally:
+            file.close()
+
+    async def _respond(self, send, status, chunks):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'text/plain')]})
+        async for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'unsupported ASGI scope type: {scope["type"]}')
+
+        request_url_path = scope['path']
+        match = self.app.router.match(request_url_path)
+        if match is None:
+            return await self._respond(send, 404, _chunks(f'{request_url_path} not found!'.encode()))
+
+        (handler, args, kwargs), path_params = match
+        call = partial(handler, *args, **kwargs, **path_params)
+        chunks = None
+        try:
+            if inspect.iscoroutinefunction(handler) or inspect.isasyncgenfunction(handler):
+                response_body = call()
+            else:
+                response_body = await self._run(call)
+            if inspect.iscoroutine(response_body):
+                response_body = await response_body
+
+            if hasattr(response_body, 'read'):
+                chunks = self._read(response_body)
+            elif hasattr(response_body, '__aiter__'):
+                chunks = aiter(response_body)
+            elif not isinstance(response_body, bytes):
+                chunks = self._iterate(iter(response_body))
+            else:
+                query_string = scope.get('query_string', b'').decode('latin-1')
+                query_args = RequestArgs({'QUERY_STRING': query_string})
+                chunks = _chunks(response_body, *query_display(query_string, query_args))
+            # Produce the first chunk before responding, so a handler which
+            # fails straight away still results in a 500 error.
+            first_chunk = await anext(chunks, b'')
+        except Exception as ex:
+            if chunks is not None:
+                await _aclose(chunks)
+            return await self._respond(send, 500, _chunks(str(ex).encode()))
+
+        try:
+            await self._respond(send, 200, _prepend(first_chunk, chunks))
+        finally:
+            await _aclose(chunks)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _aclose(chunks):
+    aclose = getattr(chunks, 'aclose', None)
+    if aclose is not None:
+        await aclose()
+
+
+async def _prepend(first_chunk, chunks):
+    yield first_chunk
+    async for chunk in chunks:
+        yield chunk
+
+
+# The ASGI application serving the routes registered in wsgi_app.py.
+asgi_app = ASGIAdapter(app)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit('Serving asgi_app requires an ASGI server such as uvicorn: pip install uvicorn')
+    uvicorn.run(asgi_app, port=5000)
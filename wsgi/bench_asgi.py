@@ -0,0 +1,84 @@
+"""
+Requests per second for sleep bound handlers as concurrent connections grow: WSGI versus the ASGIAdapter.
+
+    > python bench_asgi.py
+    > python bench_asgi.py --concurrency 1 10 100 1000 --sleep 0.05 --threads 32
+
+Requests are made in process, without sockets, so only the application model is compared:
+    wsgi        | Application called one request at a time, as wsgiref.simple_server does.
+    asgi async  | An async def handler awaiting asyncio.sleep on the event loop.
+    asgi sync   | A def handler calling time.sleep in the adapter's thread pool.
+"""
+import argparse
+import asyncio
+import time
+
+from asgi_app import ASGIAdapter
+from wsgi_app import Application
+
+
+def build_app(sleep: float) -> Application:
+    app = Application()
+
+    @app.route('/async')
+    async def async_sleep():
+        await asyncio.sleep(sleep)
+        return b'ok'
+
+    @app.route('/sync')
+    def sync_sleep():
+        time.sleep(sleep)
+        return b'ok'
+
+    return app
+
+
+async def asgi_client(adapter, path, requests):
+    async def receive():
+        return {'type': 'http.request'}
+
+    async def send(message):
+        pass
+
+    for _ in range(requests):
+        await adapter({'type': 'http', 'path': path, 'query_string': b''}, receive, send)
+
+
+async def asgi_throughput(adapter, path, concurrency, requests) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(asgi_client(adapter, path, requests) for _ in range(concurrency)))
+    return concurrency * requests / (time.perf_counter() - start)
+
+
+def wsgi_throughput(app, concurrency, requests) -> float:
+    # Connections wait in the listen queue and are served one at a time.
+    start = time.perf_counter()
+    for _ in range(concurrency * requests):
+        b''.join(app({'PATH_INFO': '/sync', 'QUERY_STRING': ''}, lambda status, headers: None))
+    return concurrency * requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--requests', type=int, default=2, help='requests per connection')
+    parser.add_argument('--sleep', type=float, default=0.05)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--wsgi-max', type=int, default=100,
+                        help='skip wsgi above this concurrency, as it only gets slower')
+    args = parser.parse_args()
+
+    app = build_app(args.sleep)
+    adapter = ASGIAdapter(app, args.threads)
+    print(f'{args.sleep * 1000:.0f} ms handlers, {args.threads} threads for sync handlers')
+    print(f'{"connections":>11} {"wsgi req/s":>11} {"asgi async":>11} {"asgi sync":>10}')
+    for concurrency in args.concurrency:
+        wsgi = wsgi_throughput(app, concurrency, args.requests) if concurrency <= args.wsgi_max else float('nan')
+        async_rate = asyncio.run(asgi_throughput(adapter, '/async', concurrency, args.requests))
+        sync_rate = asyncio.run(asgi_throughput(adapter, '/sync', concurrency, args.requests))
+        print(f'{concurrency:>11} {wsgi:>11.0f} {async_rate:>11.0f} {sync_rate:>10.0f}')
+    adapter.shutdown()
+
+
+if __name__ == '__main__':
+    main()
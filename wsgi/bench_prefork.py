@@ -0,0 +1,109 @@
+"""
+Requests per second and latency for wsgiref's make_server versus the PreforkServer.
+
+    > python bench_prefork.py
+    > python bench_prefork.py --clients 64 --requests 2000 --workers 4 --threads 16
+
+Each client opens a new connection per request, as wsgiref closes them.
+    sleep | A handler waiting 10 ms, standing in for I/O.
+    cpu   | A handler doing about 1 ms of pure Python work.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from wsgiref.simple_server import make_server
+
+from prefork import PreforkServer, QuietHandler
+from wsgi_app import Application
+
+application = Application()
+
+
+@application.route('/sleep')
+def sleep():
+    time.sleep(0.01)
+    return b'ok'
+
+
+@application.route('/cpu')
+def cpu():
+    return str(sum(n * n for n in range(20_000))).encode()
+
+
+def serve_wsgiref(port):
+    make_server('127.0.0.1', port, application, handler_class=QuietHandler).serve_forever()
+
+
+def serve_prefork(port, workers, threads):
+    PreforkServer('bench_prefork:application', '127.0.0.1', port, workers, threads, quiet=True).serve_forever()
+
+
+def wait_for(port):
+    for _ in range(100):
+        try:
+            http.client.HTTPConnection('127.0.0.1', port, timeout=1).connect()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    raise RuntimeError(f'nothing listening on port {port}')
+
+
+def client(port, path, count, latencies):
+    for _ in range(count):
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        connection.request('GET', path)
+        connection.getresponse().read()
+        connection.close()
+        latencies.append(time.perf_counter() - start)
+
+
+def load(port, path, clients, requests) -> tuple:
+    latencies = []
+    threads = [threading.Thread(target=client, args=(port, path, requests // clients, latencies))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    percentiles = statistics.quantiles(latencies, n=100)
+    return len(latencies) / elapsed, percentiles[49] * 1000, percentiles[98] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=640)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    servers = [
+        ('wsgiref', serve_wsgiref, (args.port,)),
+        (f'prefork {args.workers}x{args.threads}', serve_prefork, (args.port + 1, args.workers, args.threads)),
+    ]
+    print(f'{os.cpu_count()} CPUs, {args.clients} clients')
+    print(f'{"server":>14} {"handler":>8} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8}')
+    for name, target, server_args in servers:
+        port = server_args[0]
+        server = multiprocessing.Process(target=target, args=server_args)
+        server.start()
+        try:
+            wait_for(port)
+            for path in ('/sleep', '/cpu'):
+                rate, p50, p99 = load(port, path, args.clients, args.requests)
+                print(f'{name:>14} {path[1:]:>8} {rate:>8.0f} {p50:>8.1f} {p99:>8.1f}')
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Per request cost of query string middleware: eager parse_qs versus the lazy RequestArgs.
+
+    > python bench_query_args.py
+    > python bench_query_args.py --requests 200000
+
+Each middleware wraps a WSGI app which either ignores the query string or reads one key from it.
+The bare column calls the app directly, with a dict in place of parsing, as the baseline.
+"""
+import argparse
+import time
+from urllib.parse import parse_qs
+
+from wsgi_app import QueryStringParser
+
+QUERIES = {
+    'empty': '',
+    'short': 'page=2&sort=name',
+    'long': '&'.join(f'key{n}=value{n}' for n in range(50)),
+}
+
+
+class Bare():
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        environ['QUERY_STRING_PARSED'] = {}
+        return self.wsgi_app(environ, start_response)
+
+
+class EagerQueryStringParser():
+    # The QueryStringParser used before RequestArgs.
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        environ['QUERY_STRING_PARSED'] = parse_qs(environ['QUERY_STRING'])
+        return self.wsgi_app(environ, start_response)
+
+
+def ignores_query(environ, start_response):
+    return []
+
+
+def reads_query(environ, start_response):
+    environ['QUERY_STRING_PARSED'].get('page')
+    return []
+
+
+def per_request(middleware, app, query, requests: int) -> float:
+    wsgi_app = middleware(app)
+    start = time.perf_counter()
+    for _ in range(requests):
+        wsgi_app({'QUERY_STRING': query}, None)
+    return (time.perf_counter() - start) / requests * 1_000_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f'{"handler":>14} {"query":>6} {"bare ns":>8} {"eager ns":>9} {"lazy ns":>8}')
+    for app in (ignores_query, reads_query):
+        for label, query in QUERIES.items():
+            bare = per_request(Bare, app, query, args.requests)
+            eager = per_request(EagerQueryStringParser, app, query, args.requests)
+            lazy = per_request(QueryStringParser, app, query, args.requests)
+            print(f'{app.__name__:>14} {label:>6} {bare:>8.0f} {eager:>9.0f} {lazy:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Dispatch time against 10k registered routes: the Router trie versus a linear regex scan.
+
+    > python bench_router.py
+    > python bench_router.py --routes 10000 --lookups 20000
+
+Half the routes are static (/static/<n>/page) and half have an int parameter
+(/api/v<n>/items/<int:id>). Each lookup picks a random registered route.
+"""
+import argparse
+import random
+import re
+import time
+
+from router import Router
+
+
+def compile_regex(path):
+    # The naive alternative: one regular expression per route, tried in order.
+    def group(match):
+        converter, name = match.group(1) or 'str', match.group(2)
+        return f'(?P<{name}>\\d+)' if converter == 'int' else f'(?P<{name}>[^/]+)'
+    return re.compile(re.sub(r'<(?:(\w+):)?(\w+)>', group, path) + '$')
+
+
+def linear_match(routes, path):
+    for regex, target in routes:
+        match = regex.match(path)
+        if match:
+            return target, match.groupdict()
+    return None
+
+
+def per_lookup(match, paths) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        match(path)
+    return (time.perf_counter() - start) / len(paths) * 1_000_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--routes', type=int, default=10_000)
+    parser.add_argument('--lookups', type=int, default=20_000)
+    args = parser.parse_args()
+
+    patterns = []
+    for n in range(args.routes // 2):
+        patterns.append(f'/static/{n}/page')
+        patterns.append(f'/api/v{n}/items/<int:id>')
+    router = Router()
+    regexes = []
+    for n, pattern in enumerate(patterns):
+        router.add(pattern, n)
+        regexes.append((compile_regex(pattern), n))
+
+    random.seed(0)
+    paths = [random.choice(patterns).replace('<int:id>', str(random.randrange(10**6)))
+             for _ in range(args.lookups)]
+    assert all(router.match(path)[0] == linear_match(regexes, path)[0] for path in paths[:200])
+
+    trie = per_lookup(router.match, paths)
+    # The linear scan is slow enough to sample fewer lookups.
+    linear = per_lookup(lambda path: linear_match(regexes, path), paths[:max(args.lookups // 100, 1)])
+    print(f'{len(patterns)} routes')
+    print(f'{"router":>8} {"ns/lookup":>11}')
+    print(f'{"trie":>8} {trie:>11.0f}')
+    print(f'{"linear":>8} {linear:>11.0f}')
+
+
+if __name__ == '__main__':
+    main()
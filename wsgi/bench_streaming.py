@@ -0,0 +1,103 @@
+"""
+Peak server memory and time to first byte for large responses: buffered bytes, a generator and a file.
+
+    > python bench_streaming.py
+    > python bench_streaming.py --size-mb 256 --chunk-kb 256
+
+Each response is served by wsgiref in its own process, so the peak RSS
+(VmHWM, Linux only) of that process covers one response only.
+"""
+import argparse
+import http.client
+import multiprocessing
+import tempfile
+import time
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from wsgi_app import Application
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def build_app(size: int, chunk: int, path: str) -> Application:
+    app = Application()
+
+    @app.route('/buffered')
+    def buffered():
+        return b'x' * size
+
+    @app.route('/generator')
+    def generator():
+        block = b'x' * chunk
+        for _ in range(size // chunk):
+            yield block
+
+    @app.route('/file')
+    def file():
+        return open(path, 'rb')
+
+    return app
+
+
+def serve(size, chunk, path, ready):
+    server = make_server('127.0.0.1', 0, build_app(size, chunk, path), handler_class=QuietHandler)
+    ready.put(server.server_port)
+    server.handle_request()
+
+
+def peak_rss_mb(pid: int) -> float:
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        # The server already exited.
+        pass
+    return 0.0
+
+
+def fetch(route, size, chunk, path) -> tuple:
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(size, chunk, path, ready))
+    server.start()
+    connection = http.client.HTTPConnection('127.0.0.1', ready.get())
+    start = time.perf_counter()
+    connection.request('GET', route)
+    response = connection.getresponse()
+    response.read(1)
+    first_byte = time.perf_counter() - start
+    received = 1
+    rss = 0.0
+    while block := response.read(1024 * 1024):
+        received += len(block)
+        # Sample while the server is still sending.
+        rss = max(rss, peak_rss_mb(server.pid))
+    total = time.perf_counter() - start
+    server.join()
+    assert received >= size, f'{route} sent {received} of {size} bytes'
+    return first_byte, total, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--chunk-kb', type=int, default=64)
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+    chunk = args.chunk_kb * 1024
+
+    with tempfile.NamedTemporaryFile() as file:
+        file.truncate(size)
+        print(f'{args.size_mb} MB responses')
+        print(f'{"handler":>10} {"ttfb ms":>8} {"total s":>8} {"peak rss MB":>12}')
+        for route in ('/buffered', '/generator', '/file'):
+            first_byte, total, rss = fetch(route, size, chunk, file.name)
+            print(f'{route[1:]:>10} {first_byte * 1000:>8.1f} {total:>8.2f} {rss:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
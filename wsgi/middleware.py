@@ -40,11 +40,16 @@ class Middleware():
         return self.wsgi_app(environ, start_response)
 
 
+# The WSGI application (app) is passed to the constructor of the Middleware class.
+# The WSGI server will call the Middleware object which will run the __call__ method.
+# prefork.py can serve it with multiple processes:
+# > python prefork.py middleware:application
+application = Middleware(app)
+
+
 if __name__ == '__main__':
     # Create a server and run the app until the process is terminated.
-    # The WSGI application (app) is passed to the constructor of the Middleware class.
-    # The WSGI server will call the Middleware object which will run the __call__ method.
-    server = make_server('', 5000, Middleware(app))
+    server = make_server('', 5000, application)
     server.serve_forever()
 
 """
@@ -0,0 +1,285 @@
+"""
+make_server(...).serve_forever() handles one request at a time in one process, so it uses one core and a
+single slow request delays every other client.
+
+The PreforkServer below is a small production style WSGI server. A master process opens the listening
+socket, then forks worker processes which all accept connections from it. Each worker serves the
+connections it accepts with a pool of threads. The master only manages the workers:
+
+    - Workers which exit, or which are recycled after max_requests requests, are replaced.
+    - SIGHUP gracefully reloads: a new set of workers is started, then the old workers finish their
+      in-flight requests and exit. Load the application from an import string so new workers import
+      the current code.
+    - SIGTERM or SIGINT gracefully stops every worker, then the master.
+
+Requires fork, so it runs on Linux and macOS rather than Windows.
+
+    > python prefork.py wsgi_app:application --workers 4 --threads 8 --port 5000
+    > kill -HUP <master pid>
+"""
+import argparse
+import importlib
+import os
+import random
+import selectors
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+# Signals handled differently by the master and the workers.
+SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP)
+# Workers failing within this many seconds of starting failed to boot, e.g. the app
+# doesn't import. They are restarted after a delay doubling from MIN_BACKOFF to MAX_BACKOFF.
+BOOT_SECONDS = 5
+MIN_BACKOFF = 0.1
+MAX_BACKOFF = 30
+
+
+def load_app(target):
+    ''' Return a WSGI application, importing it when given a 'module:attribute' string. '''
+    if not isinstance(target, str):
+        return target
+    module_name, _, attribute = target.partition(':')
+    return getattr(importlib.import_module(module_name), attribute or 'application')
+
+
+class QuietHandler(WSGIRequestHandler):
+    ''' A request handler which doesn't log every request to stderr. '''
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PreforkServer():
+    ''' A pre-forked, multi-threaded WSGI server.
+
+        Args:
+            app          | A WSGI application, or a 'module:attribute' string imported by each
+                           worker. Strings let a SIGHUP reload pick up code changes.
+            host         | The address to listen on.
+            port         | The port to listen on. 0 picks a free port, see server_port.
+            workers      | The number of worker processes. Defaults to the CPU count.
+            threads      | The number of threads serving requests in each worker.
+            max_requests | Recycle a worker after about this many requests. 0 never recycles.
+                           Each worker adds up to 10% so they don't all restart at once.
+            backlog      | The length of the listen queue shared by the workers.
+            quiet        | Don't log each request.
+    '''
+
+    def __init__(self, app, host='', port=5000, workers=None, threads=8, max_requests=0,
+                 backlog=1024, quiet=False):
+        self.app = app
+        self.workers = workers or os.cpu_count()
+        self.threads = threads
+        self.max_requests = max_requests
+        self.handler_class = QuietHandler if quiet else WSGIRequestHandler
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            # Lets a replacement server bind the port while this one drains.
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.socket.bind((host, port))
+        self.socket.listen(backlog)
+        # Workers wait for the socket to be readable, then accept without blocking.
+        self.socket.setblocking(False)
+        self.server_port = self.socket.getsockname()[1]
+        # Worker pid -> (generation, monotonic start time). Generations are increased by reload.
+        self._children = {}
+        self._generation = 0
+        # Workers of the current generation which failed to boot in a row.
+        self._boot_failures = 0
+        self._spawn_after = 0
+        self._running = False
+        self._reload = False
+
+    ###########################################################################
+    # Master process
+
+    def serve_forever(self):
+        ''' Start the workers and manage them until SIGTERM or SIGINT. '''
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._request_reload)
+        for _ in range(self.workers):
+            self._spawn()
+        try:
+            while self._running:
+                if self._reload:
+                    self._reload = False
+                    self._reload_workers()
+                self._reap()
+                # Replace workers of the current generation which exited.
+                if time.monotonic() >= self._spawn_after:
+                    current = sum(1 for generation, _ in self._children.values()
+                                  if generation == self._generation)
+                    for _ in range(self.workers - current):
+                        self._spawn()
+                time.sleep(0.1)
+        finally:
+            self._stop_workers()
+            self.socket.close()
+
+    def _stop(self, signum, frame):
+        self._running = False
+
+    def _request_reload(self, signum, frame):
+        self._reload = True
+
+    def _spawn(self):
+        # Signals are blocked across the fork, so one arriving before the worker
+        # installs its handlers waits for them rather than running the master's.
+        signal.pthread_sigmask(signal.SIG_BLOCK, SIGNALS)
+        try:
+            pid = os.fork()
+            if pid == 0:
+                self._run_worker()
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, SIGNALS)
+        self._children[pid] = (self._generation, time.monotonic())
+
+    def _reap(self):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            child = self._children.pop(pid, None)
+            if child is None or child[0] != self._generation:
+                continue
+            if os.waitstatus_to_exitcode(status) and time.monotonic() - child[1] < BOOT_SECONDS:
+                delay = min(MIN_BACKOFF * 2 ** self._boot_failures, MAX_BACKOFF)
+                self._boot_failures += 1
+                self._spawn_after = time.monotonic() + delay
+                print(f'worker {pid} failed to boot, restarting in {delay:g}s', file=sys.stderr)
+            else:
+                self._boot_failures = 0
+
+    def _reload_workers(self):
+        old = list(self._children)
+        self._generation += 1
+        self._boot_failures = 0
+        self._spawn_after = 0
+        for _ in range(self.workers):
+            self._spawn()
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+
+    def _stop_workers(self, timeout=30):
+        for pid in self._children:
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in self._children:
+            self._signal(pid, signal.SIGKILL)
+        self._reap()
+
+    @staticmethod
+    def _signal(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    ###########################################################################
+    # Worker processes
+
+    def _run_worker(self):
+        # Never return into the master's code in the child.
+        code = 1
+        try:
+            stopping = threading.Event()
+            signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+            # Ctrl+C reaches the whole process group. The master stops the workers.
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, SIGNALS)
+            code = self._worker(stopping)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+
+    def _worker(self, stopping) -> int:
+        server = self._make_wsgi_server(load_app(self.app))
+        limit = self.max_requests and self.max_requests + random.randint(0, self.max_requests // 10)
+        # A connection is only accepted when a thread is free to serve it, leaving
+        # the rest in the shared queue for other workers.
+        slots = threading.BoundedSemaphore(self.threads)
+        handled = 0
+        with selectors.DefaultSelector() as selector, \
+                ThreadPoolExecutor(self.threads, thread_name_prefix='wsgi') as pool:
+            selector.register(self.socket, selectors.EVENT_READ)
+            while not stopping.is_set() and not (limit and handled >= limit):
+                if not slots.acquire(timeout=0.5):
+                    continue
+                if not selector.select(timeout=0.5):
+                    slots.release()
+                    continue
+                try:
+                    connection, address = self.socket.accept()
+                except (BlockingIOError, InterruptedError):
+                    # Another worker accepted it first.
+                    slots.release()
+                    continue
+                connection.setblocking(True)
+                pool.submit(self._handle, server, connection, address, slots)
+                handled += 1
+            # Leaving the with block waits for in-flight requests.
+        return 0
+
+    def _make_wsgi_server(self, app) -> WSGIServer:
+        # A WSGIServer around the inherited socket, used for its request handling.
+        server = WSGIServer(self.socket.getsockname(), self.handler_class, bind_and_activate=False)
+        server.socket.close()
+        server.socket = self.socket
+        host, port = self.socket.getsockname()[:2]
+        server.server_name = socket.getfqdn(host)
+        server.server_port = port
+        server.setup_environ()
+        server.set_app(app)
+        return server
+
+    @staticmethod
+    def _handle(server, connection, address, slots):
+        try:
+            server.finish_request(connection, address)
+        except Exception:
+            server.handle_error(connection, address)
+        finally:
+            server.shutdown_request(connection)
+            slots.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('app', help="the WSGI application as 'module:attribute'")
+    parser.add_argument('--host', default='')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--max-requests', type=int, default=0)
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    # Let the workers import modules from the current directory, like python -m does.
+    # The directory of this file is already on sys.path.
+    sys.path.insert(0, os.getcwd())
+    server = PreforkServer(args.app, args.host, args.port, args.workers, args.threads,
+                           args.max_requests, quiet=args.quiet)
+    print(f'master {os.getpid()} serving {args.app} on port {server.server_port} '
+          f'with {args.workers} workers x {args.threads} threads')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Routing by exact path only needs a dictionary. Paths containing parameters, such as /users/<int:id>,
+can't be dictionary keys, and testing each request against a regular expression per route gets
+slower with every route added.
+
+The Router below compiles routes into a trie with one node per path segment. Dispatching a request
+walks the trie one segment at a time, so the cost depends on the length of the path rather than
+the number of registered routes.
+"""
+
+
+def to_int(segment):
+    # isdecimal rejects signs and whitespace which int would accept.
+    if not segment.isdecimal():
+        raise ValueError(f'{segment} is not an integer')
+    return int(segment)
+
+
+# Converter name -> callable which converts a path segment or raises ValueError.
+CONVERTERS = {
+    'str': str,
+    'int': to_int,
+}
+
+
+class Node():
+    ''' One path segment of the trie. '''
+    __slots__ = ('static', 'params', 'target')
+
+    def __init__(self):
+        # Segment -> Node for static segments.
+        self.static = {}
+        # (converter name, parameter name, Node) for parameter segments.
+        self.params = []
+        # The value registered for the path ending at this node, if any.
+        self.target = None
+
+
+class Router():
+    ''' Maps URL paths to registered targets.
+
+        Paths are made of static segments and typed parameters:
+            /users/<int:id>/posts/<slug>
+
+        Parameters default to the str converter. Static segments take
+        precedence over parameters when both match.
+    '''
+
+    def __init__(self):
+        self.root = Node()
+
+    def add(self, path, target):
+        ''' Args:
+                path    | The path pattern to register.
+                target  | The value to return when a request path matches.
+        '''
+        node = self.root
+        for segment in path.split('/'):
+            if segment.startswith('<') and segment.endswith('>'):
+                converter, _, name = segment[1:-1].rpartition(':')
+                converter = converter or 'str'
+                if converter not in CONVERTERS:
+                    raise ValueError(f'unknown converter {converter} in {path}')
+                for param in node.params:
+                    if param[:2] == (converter, name):
+                        node = param[2]
+                        break
+                else:
+                    child = Node()
+                    node.params.append((converter, name, child))
+                    node = child
+            else:
+                node = node.static.setdefault(segment, Node())
+        node.target = target
+
+    def match(self, path):
+        ''' Return (target, parameters) for a request path, or None if no route matches. '''
+        params = {}
+        target = self._match(self.root, path.split('/'), 0, params)
+        return None if target is None else (target, params)
+
+    def _match(self, node, segments, index, params):
+        if index == len(segments):
+            return node.target
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            target = self._match(child, segments, index + 1, params)
+            if target is not None:
+                return target
+        # Only reached when no static route matches the rest of the path.
+        for converter, name, child in node.params:
+            if not segment:
+                break
+            try:
+                params[name] = CONVERTERS[converter](segment)
+            except ValueError:
+                continue
+            target = self._match(child, segments, index + 1, params)
+            if target is not None:
+                return target
+            del params[name]
+        return None
@@ -0,0 +1,60 @@
+import unittest
+
+from router import Router
+
+
+class RouterTests(unittest.TestCase):
+    def setUp(self):
+        self.router = Router()
+        for path in ('/', '/users', '/users/me', '/users/<int:id>', '/users/<name>/x',
+                     '/users/<int:id>/posts/<slug>', '/files/<str:name>'):
+            self.router.add(path, path)
+
+    def test_static(self):
+        ''' matches static paths exactly '''
+        self.assertEqual(self.router.match('/'), ('/', {}))
+        self.assertEqual(self.router.match('/users'), ('/users', {}))
+        self.assertIsNone(self.router.match('/groups'))
+        self.assertIsNone(self.router.match(''))
+
+    def test_static_precedence(self):
+        ''' prefers static segments over parameters which also match '''
+        self.assertEqual(self.router.match('/users/me'), ('/users/me', {}))
+        self.router.add('/files/index', 'index')
+        self.assertEqual(self.router.match('/files/index'), ('index', {}))
+        self.assertEqual(self.router.match('/files/other'), ('/files/<str:name>', {'name': 'other'}))
+
+    def test_backtracking(self):
+        ''' falls back to parameters when the static branch fails further down '''
+        self.assertEqual(self.router.match('/users/me/x'), ('/users/<name>/x', {'name': 'me'}))
+        # A failed parameter branch leaves no parameters behind.
+        self.assertEqual(self.router.match('/users/42/x'), ('/users/<name>/x', {'name': '42'}))
+        self.assertEqual(self.router.match('/users/42/posts/hello'),
+                         ('/users/<int:id>/posts/<slug>', {'id': 42, 'slug': 'hello'}))
+        self.assertIsNone(self.router.match('/users/me/y'))
+
+    def test_int_converter(self):
+        ''' converts int parameters and rejects signs and other characters '''
+        self.assertEqual(self.router.match('/users/42'), ('/users/<int:id>', {'id': 42}))
+        for segment in ('-1', '+1', ' 1', '1.5', 'ten'):
+            with self.subTest(segment=segment):
+                self.assertIsNone(self.router.match(f'/users/{segment}'))
+        self.assertEqual(self.router.match('/users/-1/x'), ('/users/<name>/x', {'name': '-1'}))
+
+    def test_empty_segments(self):
+        ''' parameters never match empty segments and trailing slashes are significant '''
+        self.assertIsNone(self.router.match('/users/'))
+        self.assertIsNone(self.router.match('/users/42/'))
+        self.assertIsNone(self.router.match('/users//x'))
+        self.assertIsNone(self.router.match('/files/'))
+        self.router.add('/users/', 'trailing')
+        self.assertEqual(self.router.match('/users/'), ('trailing', {}))
+        self.assertEqual(self.router.match('/users'), ('/users', {}))
+
+    def test_add(self):
+        ''' shares nodes between routes and rejects unknown converters '''
+        self.router.add('/users/<int:id>', 'replaced')
+        self.assertEqual(self.router.match('/users/7'), ('replaced', {'id': 7}))
+        self.assertEqual(len(self.router.root.static[''].static['users'].params), 2)
+        with self.assertRaises(ValueError):
+            self.router.add('/users/<float:score>', 'float')
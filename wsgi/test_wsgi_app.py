@@ -0,0 +1,157 @@
+import asyncio
+import io
+import threading
+import unittest
+
+from asgi_app import ASGIAdapter
+from wsgi_app import Application
+
+
+def make_app(threads):
+    ''' An Application whose handlers record the thread they ran on. '''
+    app = Application()
+
+    @app.route('/')
+    def index():
+        threads.append(threading.current_thread().name)
+        return b'index\n'
+
+    @app.route('/error')
+    def error():
+        return 1 / 0
+
+    @app.route('/numbers')
+    def numbers():
+        threads.append(threading.current_thread().name)
+        for number in range(3):
+            yield f'{number}\n'.encode()
+
+    @app.route('/async')
+    async def wait():
+        threads.append(threading.current_thread().name)
+        await asyncio.sleep(0)
+        return b'waited\n'
+
+    @app.route('/async/numbers')
+    async def async_numbers():
+        threads.append(threading.current_thread().name)
+        for number in range(3):
+            await asyncio.sleep(0)
+            yield f'{number}\n'.encode()
+
+    @app.route('/async/error')
+    async def async_error():
+        raise ValueError('async failure')
+        yield b''
+
+    @app.route('/file')
+    def file():
+        return io.BytesIO(b'file contents')
+
+    @app.route('/users/<int:id>')
+    def user(id):
+        return f'User {id}\n'.encode()
+
+    return app
+
+
+class ApplicationTests(unittest.TestCase):
+    def setUp(self):
+        self.threads = []
+        self.app = make_app(self.threads)
+
+    def get(self, path, query_string=''):
+        status = []
+        body = self.app({'PATH_INFO': path, 'QUERY_STRING': query_string},
+                        lambda response_status, headers: status.append(response_status))
+        try:
+            return status[0], b''.join(body)
+        finally:
+            close = getattr(body, 'close', None)
+            if close is not None:
+                close()
+
+    def test_routes(self):
+        ''' responds with the handler body, streaming iterables and files '''
+        self.assertEqual(self.get('/'), ('200 OK', b'index\nThe original query string: \n'))
+        self.assertEqual(self.get('/numbers'), ('200 OK', b'0\n1\n2\n'))
+        self.assertEqual(self.get('/file'), ('200 OK', b'file contents'))
+        self.assertEqual(self.get('/users/42')[1].splitlines()[0], b'User 42')
+
+    def test_errors(self):
+        ''' responds with a 404 for unknown paths and a 500 when the handler fails '''
+        self.assertEqual(self.get('/missing'), ('404 Not Found', b'/missing not found!'))
+        self.assertEqual(self.get('/users/me')[0], '404 Not Found')
+        self.assertEqual(self.get('/error'), ('500 Internal Server Error', b'division by zero'))
+
+    def test_async(self):
+        ''' runs coroutines and steps async generators to completion '''
+        self.assertEqual(self.get('/async')[1].splitlines()[0], b'waited')
+        self.assertEqual(self.get('/async/numbers'), ('200 OK', b'0\n1\n2\n'))
+        self.assertEqual(self.get('/async/error'), ('500 Internal Server Error', b'async failure'))
+
+
+class ASGIAdapterTests(unittest.TestCase):
+    def setUp(self):
+        self.threads = []
+        self.adapter = ASGIAdapter(make_app(self.threads), max_threads=2)
+        self.addCleanup(self.adapter.shutdown)
+
+    def get(self, path, query_string=b''):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'path': path, 'query_string': query_string}
+        asyncio.run(self.adapter(scope, receive, send))
+        self.assertEqual(messages[0]['type'], 'http.response.start')
+        self.assertFalse(messages[-1].get('more_body', False))
+        return messages[0]['status'], b''.join(message['body'] for message in messages[1:])
+
+    def test_routes(self):
+        ''' responds like the WSGI Application '''
+        self.assertEqual(self.get('/'), (200, b'index\nThe original query string: \n'))
+        self.assertEqual(self.get('/numbers'), (200, b'0\n1\n2\n'))
+        self.assertEqual(self.get('/file'), (200, b'file contents'))
+        self.assertEqual(self.get('/users/42')[1].splitlines()[0], b'User 42')
+
+    def test_errors(self):
+        ''' responds with a 404 for unknown paths and a 500 when the handler fails '''
+        self.assertEqual(self.get('/missing'), (404, b'/missing not found!'))
+        self.assertEqual(self.get('/error'), (500, b'division by zero'))
+        self.assertEqual(self.get('/async/error'), (500, b'async failure'))
+
+    def test_threads(self):
+        ''' runs sync handlers in the thread pool and async handlers on the event loop '''
+        self.get('/')
+        self.get('/numbers')
+        self.get('/async')
+        self.get('/async/numbers')
+        loop_thread = threading.current_thread().name
+        self.assertTrue(self.threads[0].startswith('asgi'), self.threads)
+        self.assertTrue(self.threads[1].startswith('asgi'), self.threads)
+        self.assertEqual(self.threads[2:], [loop_thread, loop_thread])
+
+    def test_async_generator(self):
+        ''' streams each chunk of an async generator as it is produced '''
+        self.assertEqual(self.get('/async/numbers'), (200, b'0\n1\n2\n'))
+
+    def test_lifespan(self):
+        ''' completes startup and shuts the thread pool down on shutdown '''
+        self.get('/')
+        messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.adapter({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        self.assertIsNone(self.adapter._pool)
@@ -12,21 +12,94 @@ CherryPy
 The application created in this step highlights some of the features required to create a more functional web application
 """
 
+import asyncio
+import inspect
+import os
+import stat
+from collections.abc import Mapping
+from types import MappingProxyType
 from urllib.parse import parse_qs
 from wsgiref.simple_server import make_server
+from wsgiref.util import FileWrapper
+
+from router import Router
+
+# The size of the blocks read from file-like response bodies.
+FILE_BLOCK_SIZE = 64 * 1024
+
+
+def stream(first_chunk, chunks):
+    ''' Yield the first chunk, then the rest. Closes chunks when the server closes the response. '''
+    try:
+        yield first_chunk
+        yield from chunks
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def iterate_async(chunks):
+    ''' Yield the chunks of an async iterable, such as an async generator, stepping it
+        on a private event loop. Closes it when the server closes the response.
+    '''
+    loop = asyncio.new_event_loop()
+    try:
+        iterator = aiter(chunks)
+        while True:
+            try:
+                yield loop.run_until_complete(anext(iterator))
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose = getattr(chunks, 'aclose', None)
+        if aclose is not None:
+            loop.run_until_complete(aclose())
+        loop.close()
+
+
+def query_display(query_string, query_args):
+    ''' Return the lines showing the unparsed and parsed query string, as bytes. '''
+    # Build the multi-line query string display.
+    query_str_display = '\n'.join(f'key: {key}, value: {value}' for key, value in query_args.items())
+    return [f'The original query string: {query_string}\n'.encode(), query_str_display.encode()]
+
+
+def file_size(file):
+    ''' Return the bytes left to read from a regular file, or None for other file-like objects. '''
+    try:
+        stat_result = os.fstat(file.fileno())
+    except (AttributeError, OSError, ValueError):
+        return None
+    if not stat.S_ISREG(stat_result.st_mode):
+        return None
+    return stat_result.st_size - file.tell()
+
 
 class Application():
-    ''' A callable class serving as a WSGI application. '''
+    ''' A callable class serving as a WSGI application.
+
+        Handlers may return:
+            bytes       | The whole response body, followed by the query string display.
+            file-like   | An object with a read method, sent with the server's
+                          wsgi.file_wrapper which may use sendfile.
+            iterable    | Such as a generator of bytes. Each chunk is sent as it is
+                          produced, so large responses aren't held in memory.
+                          Async iterables, such as async generators, are stepped on
+                          an event loop private to the response.
+    '''
 
     def __init__(self):
-        # A dictionary mapping path names to the function used to render the response body.
-        self.path_handlers = {}
+        # A trie mapping paths to the function used to render the response body.
+        self.router = Router()
 
     def route(self, path):
         ''' A callable decorator used to register a path handler.
 
             Args:
                 path | The path to register for the decorated callable.
+                       Segments such as <int:id> or <name> match any value and are
+                       passed to the handler as keyword arguments.
         '''
         def wrap(handler, *args, **kwargs):
             ''' Args:
@@ -42,7 +115,8 @@ class Application():
 
             '''
             # Store a tuple containing the handler callable and any optional arguments.
-            self.path_handlers[path] = (handler, args, kwargs)
+            self.router.add(path, (handler, args, kwargs))
+            return handler
         return wrap
 
 
@@ -52,30 +126,45 @@ class Application():
 
         # Attempt to locate the callable for the current path.
         # If missing this is a 404 -- file not found -- error.
-        if request_url_path not in self.path_handlers:
+        match = self.router.match(request_url_path)
+        if match is None:
             start_response('404 Not Found', response_headers)
             return [f'{request_url_path} not found!'.encode()]
 
         try:
-            # Unpack the handler callable and arguments
-            handler, args, kwargs = self.path_handlers[request_url_path]
-            response_body = handler(*args, **kwargs)
+            # Unpack the handler callable, arguments and path parameters.
+            (handler, args, kwargs), path_params = match
+            response_body = handler(*args, **kwargs, **path_params)
+            if inspect.iscoroutine(response_body):
+                # An async def handler, which asgi_app.py would run on its event loop.
+                response_body = asyncio.run(response_body)
+
+            if hasattr(response_body, 'read'):
+                size = file_size(response_body)
+                if size is not None:
+                    response_headers.append(('Content-Length', str(size)))
+                start_response('200 OK', response_headers)
+                file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+                return file_wrapper(response_body, FILE_BLOCK_SIZE)
+
+            if hasattr(response_body, '__aiter__'):
+                # An async generator handler, which asgi_app.py would run on its event loop.
+                response_body = iterate_async(response_body)
+
+            if not isinstance(response_body, bytes):
+                chunks = iter(response_body)
+                # Produce the first chunk before responding, so a handler which
+                # fails straight away still results in a 500 error.
+                first_chunk = next(chunks, b'')
+                start_response('200 OK', response_headers)
+                return stream(first_chunk, chunks)
+
             # Call start_response only if the handler returned without error.
             start_response('200 OK', response_headers)
-            # Show the unparsed query string for comparison.
-            query_str_orig = environ['QUERY_STRING']
-            # Get the parsed query string or return an empty dictionary.
-            query_str_dict = environ.get('QUERY_STRING_PARSED', {})
-            # Build the multi-line query string display.
-            query_str_display = [f'key: {key}, value: {value}' for key, value in query_str_dict.items()]
-            query_str_display = '\n'.join(query_str_display)
             # Return both the response body, the original unparsed query string,
-            # and the parsed query string values.
-            return [
-                response_body,
-                f'The original query string: {query_str_orig}\n'.encode(),
-                query_str_display.encode()
-            ]
+            # and the parsed query string values. The parsed query string is
+            # an empty dictionary without the QueryStringParser middleware.
+            return [response_body, *query_display(environ['QUERY_STRING'], environ.get('QUERY_STRING_PARSED', {}))]
         except Exception as ex:
             # If the handler fails, display a 500 error.
             start_response('500 Internal Server Error', response_headers)
@@ -86,21 +175,75 @@ class Application():
 Modular WSGI applications can become middleware used to extend the functionality of a WSGI application. 
 Self contained functionality such as parsing URL query strings is generalized enough to become middleware.
 
-When the below QueryStringParser object is called it uses the parse_qs callable to parse the WSGI server-provided URL query string. The parse_qs callable returns a dictionary of key-value pairs from the query string. The environ argument is updated to store the parsed dictionary with the key QUERY_STRING_PARSED.
+When the below QueryStringParser object is called it adds a RequestArgs object to the environ argument with the key QUERY_STRING_PARSED. RequestArgs is a read only dictionary of key-value pairs from the query string. It only calls parse_qs the first time it's read, so requests whose handlers never look at the query string don't pay for parsing it.
 """
+# Shared by every request without a query string.
+EMPTY_ARGS = MappingProxyType({})
+
+
+class RequestArgs(Mapping):
+    ''' The URL query string as a mapping of keys to lists of values, parsed on first access.
+
+        Use RequestArgs.from_environ to share one instance, and so one parse,
+        between every middleware and application handling a request.
+    '''
+    __slots__ = ('environ', '_parsed')
+    # The environ key holding the shared instance.
+    ENVIRON_KEY = 'wsgi_app.args'
+
+    def __init__(self, environ):
+        self.environ = environ
+        self._parsed = None
+
+    @classmethod
+    def from_environ(cls, environ):
+        args = environ.get(cls.ENVIRON_KEY)
+        if args is None:
+            args = environ[cls.ENVIRON_KEY] = cls(environ)
+        return args
+
+    @property
+    def parsed(self):
+        if self._parsed is None:
+            query = self.environ.get('QUERY_STRING')
+            self._parsed = parse_qs(query) if query else EMPTY_ARGS
+        return self._parsed
+
+    def __getitem__(self, key):
+        return self.parsed[key]
+
+    def __iter__(self):
+        return iter(self.parsed)
+
+    def __len__(self):
+        return len(self.parsed)
+
+    def __repr__(self):
+        return f'RequestArgs({self.environ.get("QUERY_STRING", "")!r})'
+
+    def first(self, key, default=None):
+        ''' Return the first value for key, or default if the key is missing. '''
+        values = self.parsed.get(key)
+        return values[0] if values else default
+
+    def getlist(self, key):
+        ''' Return every value for key, or an empty list if the key is missing. '''
+        return list(self.parsed.get(key, ()))
+
+
 class QueryStringParser():
     ''' A basic WSGI middleware example.
 
-        This middleware parses the URL query string converting it into a dictionary.
-        The dictionary is added to the environment variables which are passed to the
-        next WSGI application.
+        This middleware adds the URL query string to the environment variables
+        which are passed to the next WSGI application, as a RequestArgs object
+        which is parsed the first time it is read.
     '''
 
     def __init__(self, wsgi_app):
         self.wsgi_app = wsgi_app
 
     def __call__(self, environ, start_response):
-        environ['QUERY_STRING_PARSED'] = parse_qs(environ['QUERY_STRING'])
+        environ['QUERY_STRING_PARSED'] = RequestArgs.from_environ(environ)
         # Ensure the application is called.
         return self.wsgi_app(environ, start_response)
 
@@ -124,9 +267,35 @@ def error():
     # https://docs.python.org/3/library/exceptions.html#ZeroDivisionError
     return 1 / 0
 
+# Register the numbers function to the /numbers path.
+# Generator handlers stream their response one chunk at a time.
+@app.route('/numbers')
+def numbers():
+    for number in range(1, 1001):
+        yield f'{number}\n'.encode()
+
+# Register the wait function to the /wait path.
+# async def handlers await I/O without holding a thread when served by asgi_app.py.
+# Under WSGI they run to completion on the request thread.
+@app.route('/wait')
+async def wait():
+    await asyncio.sleep(0.1)
+    return b'Waited 0.1 seconds.\n'
+
+# Register the user function to paths such as /users/42.
+# The id segment is converted to an int and passed as a keyword argument.
+@app.route('/users/<int:id>')
+def user(id):
+    return f'User {id}\n'.encode()
+
+
+# The application with its middleware, as served below or by prefork.py:
+# > python prefork.py wsgi_app:application
+application = QueryStringParser(app)
+
 
 if __name__ == '__main__':
-    server = make_server('', 5000, QueryStringParser(app))
+    server = make_server('', 5000, application)
     server.serve_forever()
 
 """